@@ -0,0 +1,60 @@
+"""Measure import cost of the entry point modules with `python -X importtime`.
+
+    python benchmarks/bench_import_time.py
+"""
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["src.agent", "src.generate_report", "src.scheduler", "src.morning_update"]
+HEAVY = ["torch", "transformers", "openai", "yfinance", "numpy", "requests"]
+
+def parse_importtime(code: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds of the first two levels of imports made while running code."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Running {code!r} failed:\n{result.stderr.splitlines()[-1]}")
+    packages: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # The tree is indented two spaces per level; keep top-level imports and their direct children
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            packages[name.strip()] = int(cumulative)
+    return packages
+
+def import_times(module: str, startup: Dict[str, int]) -> Tuple[int, List[Tuple[str, int]]]:
+    """Return the module's cumulative import time and the heaviest packages it pulls in, in microseconds."""
+    packages = parse_importtime(f"import {module}")
+    total = packages.get(module, 0)
+    # Interpreter startup imports (site, .pth hooks) are not caused by the module
+    dependencies = {name: us for name, us in packages.items() if name not in startup and name != module}
+    heaviest = sorted(dependencies.items(), key=lambda item: -item[1])[:5]
+    return total, heaviest
+
+def main():
+    startup = parse_importtime("pass")
+    for module in MODULES:
+        try:
+            total, heaviest = import_times(module, startup)
+        except RuntimeError as e:
+            print(e)
+            continue
+        loaded = subprocess.run(
+            [sys.executable, "-c", f"import sys, {module}; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"],
+            cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+        print(f"{module:<22}{total / 1000:>9.1f} ms   heavy deps loaded: {loaded or 'none'}")
+        for name, cumulative in heaviest:
+            print(f"    {name:<30}{cumulative / 1000:>9.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Cold-start time and memory of model loading with 1 and 4 processes starting at once.
+
+Each process builds an inference-only Agent and loads the model. RSS counts shared
+page-cache pages in every process; PSS splits them between the processes that map
+them, so PSS going down with more processes shows memory-mapped weights being shared.
+
+    python benchmarks/bench_model_load.py --model facebook/opt-350m
+    python benchmarks/bench_model_load.py --model facebook/opt-350m --no-mmap
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add the parent directory to the Python path
+sys.path.append(ROOT)
+
+def memory_stats() -> Dict[str, float]:
+    """Resident, proportional and shared memory of this process in MB (Linux)."""
+    stats = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                name, value = line.split(":", 1)
+                if name in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty"):
+                    stats[name.lower()] = int(value.split()[0]) / 1024
+    except OSError:
+        import resource
+        stats["rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return stats
+
+def wait_for_others(barrier_dir: str, processes: int, timeout: float = 600.0):
+    """Mark this process as loaded and wait until every process is."""
+    open(os.path.join(barrier_dir, str(os.getpid())), "w").close()
+    deadline = time.time() + timeout
+    while len(os.listdir(barrier_dir)) < processes and time.time() < deadline:
+        time.sleep(0.05)
+
+def load_once(model: str, mmap: bool, start_at: float, barrier_dir: str, processes: int):
+    """Entry point for each child: wait for the common start time, then load the model."""
+    while time.time() < start_at:
+        time.sleep(0.001)
+    start = time.perf_counter()
+    from src.agent import Agent
+    agent = Agent({"model": {"name": model, "mmap_weights": mmap}})
+    imported = time.perf_counter()
+    agent._ensure_model()
+    loaded = time.perf_counter()
+    # Measure memory once all processes are loaded so PSS reflects the pages they share
+    wait_for_others(barrier_dir, processes)
+    print(json.dumps({
+        "import_s": round(imported - start, 3),
+        "load_s": round(loaded - imported, 3),
+        **{name: round(value, 1) for name, value in memory_stats().items()}
+    }))
+
+def run_concurrent(model: str, mmap: bool, processes: int) -> List[Dict[str, Any]]:
+    with tempfile.TemporaryDirectory() as barrier_dir:
+        start_at = time.time() + 2.0
+        args = [sys.executable, os.path.abspath(__file__), "--model", model, "--child", str(start_at),
+                "--barrier", barrier_dir, "--processes", str(processes)]
+        if not mmap:
+            args.append("--no-mmap")
+        children = [subprocess.Popen(args, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                    for _ in range(processes)]
+        results = []
+        for child in children:
+            stdout, stderr = child.communicate()
+            if child.returncode != 0:
+                raise RuntimeError(f"Loader process failed:\n{stderr}")
+            results.append(json.loads(stdout.strip().splitlines()[-1]))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="facebook/opt-350m")
+    parser.add_argument("--no-mmap", action="store_true", help="use the from_pretrained load path")
+    parser.add_argument("--child", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--barrier", help=argparse.SUPPRESS)
+    parser.add_argument("--processes", type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        load_once(args.model, not args.no_mmap, args.child, args.barrier, args.processes)
+        return
+
+    print(f"{args.model}, {'from_pretrained' if args.no_mmap else 'memory-mapped safetensors'}")
+    print(f"{'Procs':>6}{'Import s':>10}{'Load s':>9}{'RSS MB':>9}{'PSS MB':>9}{'Shared MB':>11}")
+    for processes in (1, 4):
+        results = run_concurrent(args.model, not args.no_mmap, processes)
+        mean = lambda key: sum(result.get(key, 0) for result in results) / len(results)
+        shared = mean("shared_clean") + mean("shared_dirty")
+        print(f"{processes:>6}{mean('import_s'):>10.2f}{max(r['load_s'] for r in results):>9.2f}"
+              f"{mean('rss'):>9.0f}{mean('pss'):>9.0f}{shared:>11.0f}")
+    print("Load s is the slowest process; memory columns are per-process means.")
+
+if __name__ == "__main__":
+    main()
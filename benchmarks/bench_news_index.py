@@ -0,0 +1,65 @@
+import sys
+import os
+import random
+import tempfile
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.news_index import NewsIndex
+
+SYLLABLES = "ba ko ri ta men sol dar vi lu pe gra tor na es ul fi cho om ze ya".split()
+
+def make_vocabulary(rng: random.Random, size: int = 5000) -> list:
+    return ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(size)]
+
+def make_headline(rng: random.Random, words: list) -> str:
+    return " ".join(rng.choice(words) for _ in range(rng.randint(7, 12))).capitalize()
+
+def reword(headline: str, rng: random.Random, words: list) -> str:
+    """Near-duplicate: same story with a source suffix and one word swapped."""
+    tokens = headline.split()
+    tokens[rng.randrange(len(tokens))] = rng.choice(words)
+    return " ".join(tokens) + " - " + rng.choice(["Reuters", "AP", "CNN", "BBC"])
+
+def main(stored: int = 10000, batch: int = 100):
+    rng = random.Random(42)
+    words = make_vocabulary(rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {'news_index': {'index_file': os.path.join(tmp, "news_index.json"), 'max_entries': stored * 2}}
+        index = NewsIndex(config)
+
+        headlines = [make_headline(rng, words) for _ in range(stored)]
+        start = time.perf_counter()
+        for headline in headlines:
+            index.add(headline)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index._save_index()
+        save = time.perf_counter() - start
+        size = os.path.getsize(config['news_index']['index_file'])
+
+        start = time.perf_counter()
+        index = NewsIndex(config)
+        load = time.perf_counter() - start
+
+        # Half repeats of stored stories, a quarter fresh stories and a quarter rewordings of those
+        fresh = [make_headline(rng, words) for _ in range(batch // 4)]
+        articles = [{'title': reword(rng.choice(headlines), rng, words)} for _ in range(batch // 2)]
+        articles += [{'title': title} for title in fresh]
+        articles += [{'title': reword(title, rng, words)} for title in fresh]
+        start = time.perf_counter()
+        kept = index.filter_articles(articles)
+        query = time.perf_counter() - start
+
+    print(f"Stored headlines:   {stored}")
+    print(f"Index build:        {build:.3f}s ({build / stored * 1e6:.1f} us/headline)")
+    print(f"Index save:         {save:.3f}s ({size / 1024:.0f} KiB)")
+    print(f"Index load:         {load:.3f}s")
+    print(f"Filter {len(articles)} articles: {query * 1000:.1f}ms ({query / len(articles) * 1e6:.1f} us/article)")
+    print(f"Kept {len(kept)} of {len(articles)} articles (expected {len(fresh)})")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,75 @@
+"""Compare the single-pass response parser with the previous multi-pass parser.
+
+Uses the parser test corpus in fixtures/parser_corpus.json. The previous parser saw the
+echoed prompt in front of every response, as the old decode did.
+
+    python benchmarks/bench_parser.py [repeats]
+"""
+import json
+import os
+import sys
+import time
+from typing import Dict, Any
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add the parent directory to the Python path
+sys.path.append(ROOT)
+
+from src.agent import Agent
+
+CORPUS_FILE = os.path.join(ROOT, "fixtures", "parser_corpus.json")
+
+def legacy_parse(response: str) -> Dict[str, Any]:
+    """The parser Agent used before the single-pass parser."""
+    try:
+        priority_line = [line for line in response.split('\n') if line.startswith('Priority:')][0]
+        priority = int(priority_line.split(':')[1].strip())
+        insights_start = response.find('Insights:')
+        actions_start = response.find('Actions:')
+        if insights_start != -1 and actions_start != -1:
+            insights_text = response[insights_start:actions_start]
+            insights = [line.strip('- ').strip() for line in insights_text.split('\n') if line.strip().startswith('-')]
+        else:
+            insights = ["Unable to extract insights"]
+        if actions_start != -1:
+            actions_text = response[actions_start:]
+            actions = [line.strip('- ').strip() for line in actions_text.split('\n') if line.strip().startswith('-')]
+        else:
+            actions = ["Unable to extract actions"]
+        if priority < 1 or priority > 5:
+            priority = 3
+        return {"priority": priority, "insights": insights[:2], "actions": actions[:2]}
+    except Exception:
+        return {"priority": 3, "insights": ["Unable to analyze data"], "actions": ["Please check the data format"]}
+
+def time_per_call(fn, inputs, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for args in inputs:
+            fn(*args)
+    return (time.perf_counter() - start) / (repeats * len(inputs)) * 1e6
+
+def main(repeats: int = 20):
+    agent = Agent({"model": {"enabled": False}})
+    with open(CORPUS_FILE, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+    prompts = {context_type: agent._format_prompt(context_type, {}) for context_type, _, _ in corpus}
+    echoed = [(f"{prompts[context_type]}\n{response}",) for context_type, response, _ in corpus]
+    generated = [(response, context_type) for context_type, response, _ in corpus]
+
+    legacy_us = time_per_call(legacy_parse, echoed, repeats)
+    single_us = time_per_call(agent._parse_response, generated, repeats)
+
+    def matches(analysis, expected):
+        return all(analysis[key] == expected[key] for key in ("priority", "insights", "actions"))
+    legacy_correct = sum(matches(legacy_parse(args[0]), expected) for args, (_, _, expected) in zip(echoed, corpus))
+    single_correct = sum(matches(agent._parse_response(*args), expected) for args, (_, _, expected) in zip(generated, corpus))
+
+    print(f"Corpus: {len(corpus)} responses from {os.path.relpath(CORPUS_FILE, ROOT)}")
+    print(f"{'Parser':<34}{'us/response':>12}{'Correct':>10}")
+    print(f"{'multi-pass, prompt echoed':<34}{legacy_us:>12.1f}{legacy_correct / len(corpus):>10.0%}")
+    print(f"{'single-pass, generated text only':<34}{single_us:>12.1f}{single_correct / len(corpus):>10.0%}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
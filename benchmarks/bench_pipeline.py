@@ -0,0 +1,314 @@
+"""Offline end-to-end benchmark of the morning update pipeline.
+
+Runs the full pipeline in a scratch directory against local stub servers for
+Open-Meteo, NewsAPI and Telegram, with a stub model that replays canned
+responses. Results are written as JSON so runs can be compared across commits:
+
+    python benchmarks/bench_pipeline.py --days 30
+    python benchmarks/bench_pipeline.py --days 30 --model facebook/opt-125m
+    python benchmarks/bench_pipeline.py --days 10 --generate-ms 500 --serial
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add the parent directory to the Python path
+sys.path.append(ROOT)
+
+CANNED_RESPONSES = {
+    "weather": "Priority: 4\nInsights:\n- Mild temperatures through the day\n- Light wind\nActions:\n- No weather precautions needed",
+    "stocks": "Priority: 2\nInsights:\n- TSLA up on high volume\n- AAPL slightly down\nActions:\n- Monitor TSLA momentum",
+    "news": "Priority: 2\nInsights:\n- Policy news could move markets\nActions:\n- Review the top headline",
+    "sports": "Priority: 3\nInsights:\n- Warriors won a close game\nActions:\n- Check tonight's schedule"
+}
+
+def headline(day: int, index: int) -> str:
+    """Deterministic headline whose words differ between stories."""
+    rng = random.Random(day * 1000 + index)
+    return " ".join("".join(rng.choice("bdfgklmnprstvz") + rng.choice("aeiou") for _ in range(3))
+                    for _ in range(8)).capitalize()
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+    """Serves Open-Meteo, NewsAPI and Telegram Bot API responses from memory."""
+
+    def _send_json(self, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        day = self.server.day
+        if self.path.startswith("/v1/search"):
+            self._send_json({"results": [{"latitude": 37.77, "longitude": -122.42}]})
+        elif self.path.startswith("/v1/forecast"):
+            self._send_json({"current": {
+                "temperature_2m": 15.0 + day % 10,
+                "relative_humidity_2m": 60 + day % 20,
+                "weather_code": [0, 2, 3, 61][day % 4],
+                "wind_speed_10m": 12.5
+            }})
+        elif self.path.startswith("/v2/top-headlines"):
+            # Two stories carried over from the previous day, the rest new
+            stories = [headline(day - 1, i) for i in range(2)] + [headline(day, i) for i in range(18)]
+            self._send_json({"articles": [{"title": title, "description": title.lower()} for title in stories]})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if self.path.endswith("/sendMessage"):
+            self.server.messages_sent += 1
+            self._send_json({"ok": True, "result": {"message_id": self.server.messages_sent}})
+        else:
+            self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAPIHandler)
+    server.day = 0
+    server.messages_sent = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def make_config(base_url: str, model: str = None, serial: bool = False, generate_ms: float = 0.0) -> Dict[str, Any]:
+    import yaml
+    with open(os.path.join(ROOT, "config", "config.yaml"), "r") as f:
+        config = yaml.safe_load(f)
+    config['data_source'] = 'live'
+    config['telegram'] = {'bot_token': 'bench', 'chat_id': '1'}
+    config['endpoints'] = {
+        'geocoding': f"{base_url}/v1/search",
+        'weather': f"{base_url}/v1/forecast",
+        'news': f"{base_url}/v2/top-headlines",
+        'telegram': base_url
+    }
+    config['benchmark_model'] = model
+    config['benchmark_generate_ms'] = generate_ms
+    config.setdefault('pipeline', {})['async'] = not serial
+    return config
+
+def make_agent_class(config: Dict[str, Any]):
+    """Return the real Agent when a model is requested, otherwise a stub that replays canned output."""
+    from src.agent import Agent
+    from src.tracing import get_tracer
+
+    if config.get('benchmark_model'):
+        config['model']['name'] = config['benchmark_model']
+        return Agent
+
+    class StubAgent(Agent):
+        def _load_model(self):
+            self.tokenizer = None
+            self.model = None
+
+        def analyze(self, context_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+            tracer = get_tracer()
+            prompt = self._format_prompt(context_type, data)
+            with tracer.span("tokenize", context=context_type, bytes=len(prompt.encode())) as span:
+                span["input_tokens"] = len(prompt.split())
+            response = CANNED_RESPONSES.get(context_type, CANNED_RESPONSES["news"])
+            with tracer.span("generate", context=context_type) as span:
+                # Simulated inference latency
+                time.sleep(config.get('benchmark_generate_ms', 0) / 1000)
+                span["output_tokens"] = len(response.split())
+            with tracer.span("parse", context=context_type) as span:
+                span["bytes"] = len(response.encode())
+                return dict(self._parse_response(response), source="model")
+
+    return StubAgent
+
+def run_once(config: Dict[str, Any], agent_class) -> List[Dict[str, Any]]:
+    """Run the pipeline once and return its spans."""
+    from src.morning_update import run_update, run_update_async
+    from src.tracing import configure_tracing
+
+    tracer = configure_tracing(config)
+    with tracer.span("run"):
+        if config['pipeline']['async']:
+            run_update_async(config, agent_class=agent_class)
+        else:
+            run_update(config, agent_class=agent_class)
+    tracer.flush()
+    return tracer.spans
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def first_message_ms(spans: List[Dict[str, Any]]) -> float:
+    """Time from the start of the run to the first delivered Telegram message."""
+    return next((span["attrs"]["elapsed_ms"] for span in spans if span["name"] == "first_message"), None)
+
+def history_sizes() -> Dict[str, int]:
+    return {name: os.path.getsize(os.path.join("logs", name)) for name in sorted(os.listdir("logs"))}
+
+def measure_cold_start(base_url: str, model: str, extra_args: List[str]) -> Dict[str, Any]:
+    """Time a fresh interpreter doing imports plus one run."""
+    with tempfile.TemporaryDirectory() as workdir:
+        args = [sys.executable, os.path.abspath(__file__), "--single-run", "--server", base_url] + extra_args
+        if model:
+            args += ["--model", model]
+        start = time.perf_counter()
+        result = subprocess.run(args, cwd=workdir, capture_output=True, text=True)
+        wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Cold start run failed:\n{result.stderr}")
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    stats["wall_s"] = round(wall, 4)
+    return stats
+
+def single_run(base_url: str, model: str, serial: bool, generate_ms: float):
+    """Entry point for the cold start subprocess."""
+    start = time.perf_counter()
+    config = make_config(base_url, model, serial, generate_ms)
+    agent_class = make_agent_class(config)
+    import_s = time.perf_counter() - start
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            spans = run_once(config, agent_class)
+        finally:
+            sys.stdout = stdout
+    print(json.dumps({
+        "import_s": round(import_s, 4),
+        "run_s": round(spans[-1]["duration_ms"] / 1000, 4),
+        "first_message_s": round((first_message_ms(spans) or 0) / 1000, 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1)
+    }))
+
+def summarize_stages(runs: List[List[Dict[str, Any]]]) -> Dict[str, Dict[str, float]]:
+    durations: Dict[str, List[float]] = {}
+    for spans in runs:
+        per_run: Dict[str, float] = {}
+        for span in spans:
+            per_run[span["name"]] = per_run.get(span["name"], 0.0) + span["duration_ms"]
+        for name, total in per_run.items():
+            durations.setdefault(name, []).append(total)
+    stages = {}
+    for name, values in durations.items():
+        values.sort()
+        stages[name] = {
+            "runs": len(values),
+            "mean_ms": round(statistics.fmean(values), 3),
+            "p50_ms": round(values[len(values) // 2], 3),
+            "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+            "max_ms": round(values[-1], 3)
+        }
+    return stages
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=10, help="simulated days (warm runs)")
+    parser.add_argument("--model", help="real model to load instead of the stub, e.g. facebook/opt-125m")
+    parser.add_argument("--serial", action="store_true", help="run the stages one after another instead of the async pipeline")
+    parser.add_argument("--generate-ms", type=float, default=0.0, help="simulated inference time per context for the stub model")
+    parser.add_argument("--output", help="results file (default benchmarks/results/pipeline-<commit>.json)")
+    parser.add_argument("--single-run", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--server", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single_run:
+        single_run(args.server, args.model, args.serial, args.generate_ms)
+        return
+
+    server = start_stub_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print("Measuring cold start...")
+    extra_args = (["--serial"] if args.serial else []) + ["--generate-ms", str(args.generate_ms)]
+    cold = measure_cold_start(base_url, args.model, extra_args)
+
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            config = make_config(base_url, args.model, args.serial, args.generate_ms)
+            agent_class = make_agent_class(config)
+            runs, growth = [], []
+            with open(os.devnull, "w") as devnull:
+                for day in range(args.days + 1):
+                    server.day = day
+                    stdout, sys.stdout = sys.stdout, devnull
+                    try:
+                        spans = run_once(config, agent_class)
+                    finally:
+                        sys.stdout = stdout
+                    # Day 0 warms caches and is excluded from warm timings
+                    if day > 0:
+                        runs.append(spans)
+                    growth.append({"day": day, "bytes": history_sizes()})
+                    print(f"Day {day}: {spans[-1]['duration_ms']:.1f}ms")
+        finally:
+            os.chdir(original_cwd)
+
+    warm = [spans[-1]["duration_ms"] for spans in runs]
+    first_messages = sorted(ms for ms in (first_message_ms(spans) for spans in runs) if ms is not None)
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "model": args.model or "stub",
+        "pipeline": "serial" if args.serial else "async",
+        "generate_ms": args.generate_ms,
+        "days": args.days,
+        "cold_start": cold,
+        "warm_run_ms": {
+            "mean": round(statistics.fmean(warm), 3) if warm else None,
+            "min": round(min(warm), 3) if warm else None,
+            "max": round(max(warm), 3) if warm else None
+        },
+        "first_message_ms": {
+            "p50": round(first_messages[len(first_messages) // 2], 3) if first_messages else None,
+            "max": round(first_messages[-1], 3) if first_messages else None
+        },
+        "stages": summarize_stages(runs),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "telegram_messages": server.messages_sent,
+        "history_growth": growth
+    }
+    server.shutdown()
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"pipeline-{results['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"\nCold start: {cold['wall_s']:.2f}s (imports {cold['import_s']:.2f}s, run {cold['run_s']:.2f}s)")
+    print(f"Warm run:   {results['warm_run_ms']['mean']:.1f}ms mean over {len(warm)} days")
+    if first_messages:
+        print(f"First msg:  {results['first_message_ms']['p50']:.1f}ms p50")
+    print(f"Peak RSS:   {results['peak_rss_mb']:.1f} MB")
+    final = growth[-1]["bytes"]
+    print("History:    " + ", ".join(f"{name} {size / 1024:.0f} KiB" for name, size in final.items()))
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compare the slotted record model and msgpack encoding with the JSON dict layout.
+
+    python benchmarks/bench_records.py [records]
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.context_manager import ContextType
+from src.records import memory_from_payload, memory_to_payload
+from src.serialization import msgpack, read_payload, write_payload
+
+def make_dict_memory(count: int) -> dict:
+    """Memory in the layout the JSON logs use: nested dicts with ISO timestamps."""
+    contexts = list(ContextType)
+    start = 1_700_000_000
+    memory = {"interactions": [], "learned_patterns": {c.value: [] for c in contexts},
+              "performance_metrics": {}, "adaptation_history": []}
+    for i in range(count):
+        context = contexts[i % len(contexts)]
+        timestamp = datetime.fromtimestamp(start + i * 60).isoformat()
+        insights = [f"Insight {i % 97} about {context.value}", f"Second insight {i % 13}"]
+        memory["interactions"].append({
+            "timestamp": timestamp,
+            "context_type": context.value,
+            "analysis": {"priority": i % 5 + 1, "insights": insights, "actions": [f"Action {i % 7}"]},
+            "data_hash": f"{i:016x}"
+        })
+        memory["learned_patterns"][context.value].append({
+            "timestamp": timestamp, "importance": i % 5 + 1, "key_insights": insights
+        })
+    return memory
+
+def retained_bytes(build) -> int:
+    """Bytes still allocated after build() returns, i.e. the size of the structure it made."""
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del value
+    return current
+
+def time_call(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+def main(count: int = 100_000):
+    source = make_dict_memory(count)
+    legacy_payload = memory_to_payload(memory_from_payload(source, 'json'), 'json')
+    record_memory = memory_from_payload(legacy_payload, 'json')
+    json_text = json.dumps(legacy_payload)
+
+    # Decode from serialized form so every string is freshly allocated in both cases
+    dict_bytes = retained_bytes(lambda: json.loads(json_text))
+    record_bytes = retained_bytes(lambda: memory_from_payload(json.loads(json_text), 'json'))
+    # Each analysis is stored once as an interaction and once as a learned pattern
+    print(f"Records:                 {count} analyses")
+    print(f"In memory, dicts:        {dict_bytes / count:.0f} bytes/analysis")
+    print(f"In memory, slotted:      {record_bytes / count:.0f} bytes/analysis")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "agent_memory.json")
+        _, save_json = time_call(lambda: write_payload(json_path, legacy_payload, 'json'))
+        _, load_json = time_call(lambda: read_payload(json_path, 'json'))
+        _, load_json_records = time_call(lambda: memory_from_payload(read_payload(json_path, 'json'), 'json'))
+        print(f"JSON dicts:              save {save_json:.2f}s, load {load_json:.2f}s "
+              f"({load_json_records:.2f}s to records), {os.path.getsize(json_path) / count:.0f} bytes/analysis on disk")
+
+        if msgpack is None:
+            print("msgpack is not installed; skipping the binary format")
+            return
+        msgpack_path = os.path.join(tmp, "agent_memory.msgpack")
+        _, save_msgpack = time_call(lambda: write_payload(msgpack_path, memory_to_payload(record_memory, 'msgpack'), 'msgpack'))
+        _, load_msgpack = time_call(lambda: memory_from_payload(read_payload(msgpack_path, 'msgpack'), 'msgpack'))
+        print(f"msgpack records:         save {save_msgpack:.2f}s, load {load_msgpack:.2f}s, "
+              f"{os.path.getsize(msgpack_path) / count:.0f} bytes/analysis on disk")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,86 @@
+"""Decode speed with and without a draft model on the four context prompts.
+
+Tokens/sec is output tokens over generate time. Acceptance rate is the share of
+drafted tokens the main model kept: each main-model forward pass in assisted
+generation adds one token of its own on top of the accepted draft tokens.
+
+    python benchmarks/bench_speculative.py --model facebook/opt-350m --draft facebook/opt-125m
+"""
+import argparse
+import os
+import sys
+from typing import Dict, Any, List
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent import Agent
+from src.context_manager import ContextType
+from src.morning_update import get_sample_data
+from src.tracing import configure_tracing
+
+class ForwardCounter:
+    """Counts forward passes of a model."""
+
+    def __init__(self, model):
+        self.calls = 0
+        model.register_forward_hook(self._hook)
+
+    def _hook(self, module, inputs, output):
+        self.calls += 1
+
+def run(agent: Agent, repeats: int) -> Dict[str, Dict[str, Any]]:
+    import torch
+    target = ForwardCounter(agent.model)
+    draft = ForwardCounter(agent.draft_model) if agent.draft_model is not None else None
+    contexts = dict(zip(ContextType, get_sample_data()))
+    results = {}
+    for context_type, data in contexts.items():
+        tokens = seconds = target_calls = draft_calls = 0
+        for repeat in range(repeats):
+            torch.manual_seed(repeat)
+            tracer = configure_tracing({"tracing": {"enabled": False}})
+            target.calls, draft_calls_before = 0, draft.calls if draft else 0
+            try:
+                agent.analyze(context_type.value, data)
+            except Exception as e:
+                # Timeouts and unparsable output still count for decode speed
+                print(f"{context_type.value}: {e}")
+            generate = next(span for span in tracer.spans if span["name"] == "generate")
+            tokens += generate["attrs"].get("output_tokens", 0)
+            seconds += generate["duration_ms"] / 1000
+            target_calls += target.calls
+            draft_calls += (draft.calls - draft_calls_before) if draft else 0
+        results[context_type.value] = {
+            "tokens_per_s": tokens / seconds if seconds else 0.0,
+            "acceptance": (tokens - target_calls) / draft_calls if draft_calls else None
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="facebook/opt-350m")
+    parser.add_argument("--draft", default="facebook/opt-125m")
+    parser.add_argument("--num-assistant-tokens", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    table: Dict[str, List] = {}
+    for draft_model in (None, args.draft):
+        agent = Agent({"model": {"name": args.model, "draft_model": draft_model,
+                                 "num_assistant_tokens": args.num_assistant_tokens}})
+        agent._ensure_model()
+        # Warm-up so one-time allocations are not timed
+        run(agent, 1)
+        for context, stats in run(agent, args.repeats).items():
+            table.setdefault(context, []).append(stats)
+
+    print(f"{args.model} alone vs. drafted by {args.draft} ({args.num_assistant_tokens} tokens per step)")
+    print(f"{'Context':<10}{'Base tok/s':>12}{'Assisted tok/s':>16}{'Speedup':>9}{'Acceptance':>12}")
+    for context, (base, assisted) in table.items():
+        speedup = assisted["tokens_per_s"] / base["tokens_per_s"] if base["tokens_per_s"] else 0.0
+        print(f"{context:<10}{base['tokens_per_s']:>12.1f}{assisted['tokens_per_s']:>16.1f}"
+              f"{speedup:>8.2f}x{assisted['acceptance'] or 0:>12.0%}")
+
+if __name__ == "__main__":
+    main()
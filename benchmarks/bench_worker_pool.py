@@ -0,0 +1,79 @@
+"""Throughput of the analysis worker pool (analyses/sec) with 1, 2, 4 and 8 worker processes.
+
+Without --model each job burns CPU for --work-ms in pure Python, standing in for
+CPU-bound generation, so the numbers show how well the pool scales past the GIL.
+
+    python benchmarks/bench_worker_pool.py --jobs 64 --work-ms 100
+    python benchmarks/bench_worker_pool.py --jobs 32 --model facebook/opt-125m
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Dict, Any
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent import Agent
+from src.context_manager import ContextType
+from src.worker_pool import AnalysisPool
+
+CANNED_RESPONSE = "Priority: 3\nInsights:\n- Steady conditions\nActions:\n- Nothing to do"
+
+class CPUBoundAgent(Agent):
+    """Stands in for the model: each analysis spins the CPU for a fixed time."""
+
+    def _load_model(self):
+        self.tokenizer = None
+        self.model = object()
+
+    def analyze(self, context_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        self._format_prompt(context_type, data)
+        end = time.thread_time() + self.config['benchmark_work_ms'] / 1000
+        while time.thread_time() < end:
+            pass
+        return self._parse_response(CANNED_RESPONSE)
+
+def make_jobs(count: int):
+    contexts = list(ContextType)
+    return [(contexts[i % len(contexts)], {"sample": i, "value": i * 1.5}) for i in range(count)]
+
+def measure(config: Dict[str, Any], agent_class: type, processes: int, jobs) -> Dict[str, float]:
+    start = time.perf_counter()
+    with AnalysisPool(config, agent_class, processes) as pool:
+        # Warm-up: one job per worker so model loading is timed separately
+        pool.analyze_batch(jobs[:processes])
+        ready = time.perf_counter()
+        results = pool.analyze_batch(jobs)
+        done = time.perf_counter()
+    failed = sum(result is None for result in results)
+    return {"startup_s": ready - start, "run_s": done - ready, "rate": len(jobs) / (done - ready), "failed": failed}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=64)
+    parser.add_argument("--work-ms", type=float, default=100.0, help="CPU time per simulated analysis")
+    parser.add_argument("--model", help="real model to load in each worker instead of the simulated one")
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated pool sizes")
+    args = parser.parse_args()
+
+    config = {
+        "model": {"enabled": True, "name": args.model or "facebook/opt-350m"},
+        "workers": {"start_method": "spawn"},
+        "benchmark_work_ms": args.work_ms
+    }
+    agent_class = Agent if args.model else CPUBoundAgent
+    jobs = make_jobs(args.jobs)
+    print(f"{os.cpu_count()} CPUs, {args.jobs} jobs, {args.model or f'{args.work_ms:g}ms simulated analyses'}")
+    print(f"{'Workers':>8}{'Startup s':>11}{'Run s':>9}{'Analyses/s':>12}{'Speedup':>9}")
+    baseline = None
+    for processes in (int(n) for n in args.workers.split(",")):
+        stats = measure(config, agent_class, processes, jobs)
+        baseline = baseline or stats["rate"]
+        failed = f"  ({stats['failed']} failed)" if stats["failed"] else ""
+        print(f"{processes:>8}{stats['startup_s']:>11.2f}{stats['run_s']:>9.2f}{stats['rate']:>12.1f}"
+              f"{stats['rate'] / baseline:>8.2f}x{failed}")
+
+if __name__ == "__main__":
+    main()
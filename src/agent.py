@@ -1,28 +1,190 @@
-from typing import Dict, Any, List, Optional
-import openai
-from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+import hashlib
 import json
 import os
+import time
+from src.budget import Budget
 from src.context_manager import ContextManager, ContextType
-from transformers import AutoModelForCausalLM, AutoTokenizer
-import torch
+from src.decide_priority import rule_based_analysis
+from src.learning import ContextStats, learns_from, rebuild_stats, stats_from_payload, stats_to_payload
+from src.records import AnalysisRecord, PatternRecord, empty_memory, memory_from_payload, memory_to_payload
+from src.response_parser import parse_response
+from src.serialization import storage_backend, storage_format, read_payload, write_payload
+from src.tracing import get_tracer
+
+# transformers and torch are imported on first inference so that paths which only
+# read memory or run without a model never pay for them
+
+MEMORY_FILE = os.path.join("logs", "agent_memory.json")
+BINARY_MEMORY_FILE = os.path.join("logs", "agent_memory.msgpack")
+
+class GenerationTimeout(Exception):
+    """Generation was stopped by its time allotment before the model finished."""
+
+class ResponseParseError(Exception):
+    """The model output did not contain a usable analysis."""
+
+def fallback_reason(error: Exception) -> str:
+    """Reason recorded with the fallback analysis used after the model failed."""
+    if isinstance(error, GenerationTimeout):
+        return "timeout"
+    if isinstance(error, ResponseParseError):
+        return "unparsed"
+    return "error"
+
+def load_memory(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Load agent memory from file without constructing an Agent."""
+    fmt = storage_format(config or {})
+    try:
+        if fmt == 'msgpack' and os.path.exists(BINARY_MEMORY_FILE):
+            return memory_from_payload(read_payload(BINARY_MEMORY_FILE, 'msgpack'), 'msgpack')
+        if os.path.exists(MEMORY_FILE):
+            # JSON memory, including files written before the binary format existed
+            return memory_from_payload(read_payload(MEMORY_FILE, 'json'), 'json')
+    except Exception as e:
+        print(f"Error loading agent memory: {e}")
+    return empty_memory()
+
+def latest_patterns(memory: Dict[str, Any]) -> Dict[ContextType, PatternRecord]:
+    """Most recent learned pattern for each context in a loaded memory."""
+    return {
+        ContextType(context): patterns[-1]
+        for context, patterns in memory["learned_patterns"].items()
+        if patterns
+    }
+
+def load_latest_patterns(config: Dict[str, Any]) -> Dict[ContextType, PatternRecord]:
+    """Most recent learned pattern for each context, read from the configured backend."""
+    if storage_backend(config) == 'sqlite':
+        from src.storage import SQLiteStore, sqlite_path
+        if not os.path.exists(sqlite_path(config)):
+            return {}
+        # Read-only connection; WAL lets this run while another process writes
+        store = SQLiteStore(config, read_only=True)
+        try:
+            return store.latest_patterns()
+        finally:
+            store.close()
+    return latest_patterns(load_memory(config))
+
+def data_fingerprint(data: Any) -> str:
+    """Stable short hash of context data, used to reuse analyses of unchanged data."""
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()[:16]
 
 class Agent:
-    def __init__(self, config: Dict[str, Any], context_manager: ContextManager):
+    def __init__(self, config: Dict[str, Any], context_manager: Optional[ContextManager] = None):
         self.config = config
         self.context_manager = context_manager
-        openai.api_key = config['api_keys']['openai']
-        self.memory_file = os.path.join("logs", "agent_memory.json")
-        self.memory = self._load_memory()
+        self.storage_format = storage_format(config)
+        self.memory_file = BINARY_MEMORY_FILE if self.storage_format == 'msgpack' else MEMORY_FILE
+        # With the SQLite backend, analyses share the context manager's database and are queried, not loaded
+        self.store = context_manager.store if context_manager else None
+        # Without a context manager the agent only runs inference (analysis workers) and memory is not loaded
+        self.memory = self._load_memory() if context_manager and not self.store else empty_memory()
         self.goals = self._initialize_goals()
-        self.learning_rate = 0.1
-        self.model_name = "facebook/opt-350m"
+        self._load_metrics()
+        learning = config.get('learning', {}) or {}
+        # Per analysis of a context; 0.9 halves the weight of an insight term in about a week of runs
+        self.decay = float(learning.get('decay', 0.9))
+        self.predict_enabled = learning.get('predict', False)
+        self.min_samples = int(learning.get('min_samples', 7))
+        self.max_std = float(learning.get('max_std', 0.5))
+        self.min_hit_rate = float(learning.get('min_hit_rate', 0.5))
+        self.revalidate_every = int(learning.get('revalidate_every', 5))
+        self.context_stats = self._load_stats() if context_manager else {}
+        model_settings = config.get('model', {}) or {}
+        self.model_name = model_settings.get('name', "facebook/opt-350m")
+        self.use_model = model_settings.get('enabled', True)
+        self.mmap_weights = model_settings.get('mmap_weights', True)
+        self.device_map = model_settings.get('device_map')
+        # Smaller model from the same tokenizer family that proposes tokens for the main model to verify
+        self.draft_model_name = model_settings.get('draft_model')
+        self.num_assistant_tokens = int(model_settings.get('num_assistant_tokens', 5))
+        self.generate_seconds = Budget(config).stages['generate']
+        self.tokenizer = None
+        self.model = None
+        self.draft_model = None
+        self._examples: Dict[str, frozenset] = {}
+
+    def _ensure_model(self):
+        """Load the model on first use."""
+        if self.model is None:
+            with get_tracer().span("model_load", model=self.model_name):
+                self._load_model()
+
+    def _load_model(self):
+        """Load the tokenizer, the language model used by analyze and the optional draft model."""
+        from transformers import AutoTokenizer
         self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        self.model = AutoModelForCausalLM.from_pretrained(
-            self.model_name,
-            torch_dtype=torch.float16,
-            device_map="auto"
+        self.model = self._load_weights(self.model_name)
+        if self.draft_model_name:
+            with get_tracer().span("model_load", model=self.draft_model_name, draft=True):
+                draft_model = self._load_weights(self.draft_model_name)
+            # Draft tokens are verified by id, so both models must share a vocabulary
+            if draft_model.config.vocab_size == self.model.config.vocab_size:
+                self.draft_model = draft_model
+            else:
+                print(f"Draft model {self.draft_model_name} has a different vocabulary; decoding without it")
+
+    def _load_weights(self, model_name: str):
+        import torch
+        from transformers import AutoModelForCausalLM
+        if self.mmap_weights and self.device_map is None:
+            model = self._load_mmap_model(model_name)
+            if model is not None:
+                return model
+        # Weights are loaded straight into the model without random initialization first
+        options = {"device_map": self.device_map} if self.device_map else {}
+        model = AutoModelForCausalLM.from_pretrained(
+            model_name,
+            torch_dtype=torch.float16 if torch.cuda.is_available() else "auto",
+            low_cpu_mem_usage=True,
+            **options
         )
+        if torch.cuda.is_available() and not self.device_map:
+            model.to("cuda")
+        return model.eval()
+
+    def _weights_file(self, model_name: str) -> str:
+        if os.path.isdir(model_name):
+            return os.path.join(model_name, "model.safetensors")
+        from huggingface_hub import hf_hub_download
+        return hf_hub_download(model_name, "model.safetensors")
+
+    def _load_mmap_model(self, model_name: str):
+        """Build a model on the meta device and point its parameters at memory-mapped safetensors.
+
+        The weights stay backed by the page cache, so processes on one host loading the same
+        file share a single copy. Returns None when the checkpoint cannot be used this way.
+        """
+        import torch
+        from safetensors.torch import load_file
+        from transformers import AutoConfig, AutoModelForCausalLM
+        try:
+            weights_file = self._weights_file(model_name)
+            state_dict = load_file(weights_file)
+            # Parameters are created without allocating or initializing memory
+            with torch.device("meta"):
+                model = AutoModelForCausalLM.from_config(AutoConfig.from_pretrained(model_name))
+            expected = model.state_dict().keys()
+            prefix = f"{model.base_model_prefix}."
+            # Some checkpoints are saved from the base model, without its prefix
+            state_dict = {
+                prefix + key if key not in expected and prefix + key in expected else key: tensor
+                for key, tensor in state_dict.items()
+            }
+            model.load_state_dict(state_dict, strict=False, assign=True)
+            model.tie_weights()
+            on_meta = [name for name, tensor in [*model.named_parameters(), *model.named_buffers()] if tensor.is_meta]
+            if on_meta:
+                raise ValueError(f"{len(on_meta)} tensors missing from {weights_file}, e.g. {on_meta[0]}")
+        except Exception as e:
+            print(f"Memory-mapped load unavailable for {model_name}, loading normally: {e}")
+            return None
+        if torch.cuda.is_available():
+            # GPU copies cannot share the page cache, but loading still skips initialization
+            model.to("cuda", dtype=torch.float16)
+        return model.eval()
 
     def _format_prompt(self, context_type: str, data: Dict[str, Any]) -> str:
         context_prompts = {
@@ -96,13 +258,27 @@ Current data to analyze:
 Provide your analysis following the exact format shown in the example above."""
 
     def analyze(self, context_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        import torch
+        self._ensure_model()
+        tracer = get_tracer()
         prompt = self._format_prompt(context_type, data)
-        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
+        with tracer.span("tokenize", context=context_type, bytes=len(prompt.encode())) as span:
+            inputs = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
+            span["input_tokens"] = int(inputs["input_ids"].shape[1])
         
-        with torch.no_grad():
+        # Assisted generation: the draft model proposes tokens and the main model verifies them in one pass
+        assisted = {}
+        if self.draft_model is not None:
+            self.draft_model.generation_config.num_assistant_tokens = self.num_assistant_tokens
+            assisted = {"assistant_model": self.draft_model}
+        with tracer.span("generate", context=context_type, max_time=self.generate_seconds,
+                         draft_model=self.draft_model_name if assisted else None) as span, torch.no_grad():
+            start = time.perf_counter()
             outputs = self.model.generate(
                 **inputs,
+                **assisted,
                 max_new_tokens=200,
+                max_time=self.generate_seconds,
                 num_return_sequences=1,
                 temperature=0.8,
                 top_p=0.9,
@@ -110,69 +286,52 @@ Provide your analysis following the exact format shown in the example above."""
                 no_repeat_ngram_size=3,
                 do_sample=True
             )
+            span["output_tokens"] = int(outputs.shape[1] - inputs["input_ids"].shape[1])
+            if time.perf_counter() - start >= self.generate_seconds:
+                # Output cut off by max_time is incomplete, so do not parse it
+                raise GenerationTimeout(f"generation exceeded {self.generate_seconds:g}s")
         
-        response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-        
-        try:
-            # Extract priority
-            priority_line = [line for line in response.split('\n') if line.startswith('Priority:')][0]
-            priority = int(priority_line.split(':')[1].strip())
-            
-            # Extract insights
-            insights_start = response.find('Insights:')
-            actions_start = response.find('Actions:')
-            if insights_start != -1 and actions_start != -1:
-                insights_text = response[insights_start:actions_start]
-                insights = [line.strip('- ').strip() for line in insights_text.split('\n') if line.strip().startswith('-')]
-            else:
-                insights = ["Unable to extract insights"]
-            
-            # Extract actions
-            if actions_start != -1:
-                actions_text = response[actions_start:]
-                actions = [line.strip('- ').strip() for line in actions_text.split('\n') if line.strip().startswith('-')]
-            else:
-                actions = ["Unable to extract actions"]
-            
-            # Validate priority
-            if priority < 1 or priority > 5:
-                priority = 3
-            
-            return {
-                "priority": priority,
-                "insights": insights[:2],  # Limit to 2 insights
-                "actions": actions[:2]     # Limit to 2 actions
-            }
-        except Exception as e:
-            print(f"Error parsing response: {e}")
-            print(f"Raw response: {response}")
-            return {
-                "priority": 3,
-                "insights": ["Unable to analyze data"],
-                "actions": ["Please check the data format"]
-            }
+        with tracer.span("parse", context=context_type) as span:
+            # Only the generated continuation; the echoed prompt contains an example answer
+            response = self.tokenizer.decode(outputs[0, inputs["input_ids"].shape[1]:], skip_special_tokens=True)
+            span["bytes"] = len(response.encode())
+            analysis = self._parse_response(response, context_type)
+            span["confident"] = analysis["confident"]
+            analysis["source"] = "model"
+            return analysis
+
+    def _parse_response(self, response: str, context_type: Optional[str] = None) -> Dict[str, Any]:
+        """Extract priority, insights and actions from the generated text."""
+        examples = self._example_items(context_type) if context_type else ()
+        parsed = parse_response(response, examples)
+        if parsed.priority is None:
+            raise ResponseParseError(f"no priority in model output: {response[:200]!r}")
+        return parsed.to_analysis()
+
+    def _example_items(self, context_type: str) -> frozenset:
+        """Insights and actions of the prompt's example answer, which the model sometimes copies."""
+        if context_type not in self._examples:
+            example = parse_response(self._format_prompt(context_type, {}))
+            self._examples[context_type] = frozenset(example.insights + example.actions)
+        return self._examples[context_type]
+
+    def memory_files(self) -> List[str]:
+        """Files the memory is read from; JSON memory is read when there is no binary file."""
+        return [self.memory_file, MEMORY_FILE]
 
     def _load_memory(self) -> Dict[str, Any]:
         """Load agent's memory from file."""
-        try:
-            if os.path.exists(self.memory_file):
-                with open(self.memory_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"Error loading agent memory: {e}")
-        return {
-            "interactions": [],
-            "learned_patterns": {},
-            "performance_metrics": {},
-            "adaptation_history": []
-        }
+        return load_memory(self.config)
 
     def _save_memory(self):
         """Save agent's memory to file."""
+        if self.store:
+            # Rows are written in batches by the store
+            return
         try:
-            os.makedirs(os.path.dirname(self.memory_file), exist_ok=True)
-            with open(self.memory_file, 'w') as f:
-                json.dump(self.memory, f, indent=2)
+            with get_tracer().span("persist.agent_memory") as span:
+                payload = memory_to_payload(self.memory, self.storage_format)
+                span["bytes"] = write_payload(self.memory_file, payload, self.storage_format)
         except Exception as e:
             print(f"Error saving agent memory: {e}")
 
@@ -187,7 +346,6 @@ Provide your analysis following the exact format shown in the example above."""
                 "Improve decision-making over time"
             ],
             "metrics": {
-                "relevance_score": 0.0,
                 "user_engagement": 0.0,
                 "adaptation_rate": 0.0
             }
@@ -196,48 +354,163 @@ Provide your analysis following the exact format shown in the example above."""
     def analyze_context(self, context_type: ContextType, data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze context data and make autonomous decisions."""
         try:
-            # Analyze the context
-            analysis = self.analyze(context_type.value, data)
-            
-            # Update memory with new analysis
-            self.memory["interactions"].append({
-                "timestamp": datetime.now().isoformat(),
-                "context_type": context_type.value,
-                "analysis": analysis
-            })
-            
-            # Learn from the analysis
-            self._learn_from_analysis(context_type, analysis)
-            
-            # Save updated memory
-            self._save_memory()
-            return analysis
+            # Analyze the context, or fall back to cached and rule-based analysis without a model
+            if self.use_model:
+                analysis = self.predicted_analysis(context_type, data)
+                try:
+                    analysis = analysis or self.analyze(context_type.value, data)
+                except Exception as e:
+                    print(f"Error in model analysis: {e}")
+                    analysis = self.fallback_analysis(context_type, data, fallback_reason(e))
+            else:
+                analysis = self.fallback_analysis(context_type, data, "no_model")
+            return self.record_analysis(context_type, analysis, data)
         except Exception as e:
             print(f"Error in context analysis: {e}")
             return {}
 
+    def cached_analysis(self, context_type: ContextType, data: Any) -> Optional[Dict[str, Any]]:
+        """Return the latest stored analysis of identical data for this context, if any."""
+        fingerprint = data_fingerprint(data)
+        if self.store:
+            record = self.store.find_analysis(context_type, fingerprint)
+            return dict(record.to_analysis(), source="cache") if record else None
+        for record in reversed(self.memory["interactions"]):
+            if record.context_type == context_type and record.data_hash == fingerprint:
+                return dict(record.to_analysis(), source="cache")
+        return None
+
+    def fallback_analysis(self, context_type: ContextType, data: Any, reason: str = "no_model") -> Dict[str, Any]:
+        """Analyze without the model: cached analysis, then rule-based priority, then the default priority 3.
+
+        The source of the analysis and the reason the model was skipped are recorded as a trace event.
+        """
+        analysis = self.cached_analysis(context_type, data)
+        if analysis is None:
+            try:
+                analysis = rule_based_analysis(context_type.value, data, self.config)
+            except Exception as e:
+                print(f"Error in rule-based analysis: {e}")
+                analysis = {"priority": 3, "insights": [], "actions": [], "source": "default"}
+        get_tracer().event("fallback", context=context_type.value, source=analysis["source"], reason=reason)
+        return analysis
+
+    def record_analysis(self, context_type: ContextType, analysis: Dict[str, Any], data: Any = None) -> Dict[str, Any]:
+        """Store an analysis produced by the model or another analyzer and learn from it."""
+        # Update memory with new analysis
+        record = AnalysisRecord.from_analysis(
+            context_type,
+            analysis,
+            int(time.time()),
+            data_fingerprint(data) if data is not None else None
+        )
+        if self.store:
+            self.store.add_analysis(record)
+        else:
+            self.memory["interactions"].append(record)
+        
+        # Learn from the analysis
+        self._learn_from_analysis(context_type, analysis)
+        
+        # Save updated memory
+        self._save_memory()
+        return analysis
+
     def _learn_from_analysis(self, context_type: ContextType, analysis: Dict[str, Any]):
         """Learn from the analysis and update patterns."""
         try:
-            # Update learned patterns
-            if context_type.value not in self.memory["learned_patterns"]:
-                self.memory["learned_patterns"][context_type.value] = []
+            # Update learned patterns; the SQLite backend derives them from the stored analyses
+            if not self.store:
+                if context_type.value not in self.memory["learned_patterns"]:
+                    self.memory["learned_patterns"][context_type.value] = []
+                
+                self.memory["learned_patterns"][context_type.value].append(PatternRecord(
+                    timestamp=int(time.time()),
+                    importance=analysis.get("priority", 0),
+                    key_insights=analysis.get("insights", [])
+                ))
             
-            self.memory["learned_patterns"][context_type.value].append({
-                "timestamp": datetime.now().isoformat(),
-                "importance": analysis.get("priority", 0),
-                "key_insights": analysis.get("insights", [])
-            })
-            
-            # Update performance metrics
-            self.goals["metrics"]["relevance_score"] = (
-                self.goals["metrics"]["relevance_score"] * (1 - self.learning_rate) +
-                analysis.get("priority", 0) * self.learning_rate
-            )
+            # Update the context's statistics from confident model output only; predictions are
+            # counted so the model checks the context again after revalidate_every of them
+            stats = self.context_stats.setdefault(context_type.value, ContextStats())
+            if learns_from(analysis.get("source"), analysis.get("confident")):
+                stats.update(analysis.get("priority", 3), analysis.get("insights", []), self.decay)
+            elif analysis.get("source") == "stats":
+                stats.predictions += 1
+            # Saved with the memory file; the SQLite backend stores them in report_metrics
+            self.memory["context_stats"] = stats_to_payload(self.context_stats)
+            self.memory["performance_metrics"] = dict(self.goals["metrics"])
             
         except Exception as e:
             print(f"Error in learning process: {e}")
 
+    def _load_metrics(self):
+        """Continue the goal metrics from the previous run."""
+        try:
+            saved = self.store.get_meta("performance_metrics") if self.store else self.memory.get("performance_metrics")
+            for key, value in (saved or {}).items():
+                if key in self.goals["metrics"]:
+                    self.goals["metrics"][key] = value
+        except Exception as e:
+            print(f"Error loading agent metrics: {e}")
+
+    def _load_stats(self) -> Dict[str, ContextStats]:
+        """Load the per-context statistics, rebuilding them from stored analyses the first time."""
+        try:
+            saved = stats_from_payload(
+                self.store.get_meta("context_stats") if self.store else self.memory.get("context_stats")
+            )
+            if saved is not None:
+                return saved
+            if self.store:
+                return rebuild_stats(self.store.iter_analyses(), self.decay)
+            return rebuild_stats(
+                ((record.context_type.value, record.priority, record.insights, record.source,
+                  (record.extra or {}).get("confident")) for record in self.memory["interactions"]),
+                self.decay
+            )
+        except Exception as e:
+            print(f"Error loading context statistics: {e}")
+            return {}
+
+    def predicted_analysis(self, context_type: ContextType, data: Any) -> Optional[Dict[str, Any]]:
+        """Analysis from the learned priority when it is predictable enough to skip the model.
+
+        Insights come from the rules. The prediction is not used when the rules find the data
+        more urgent than usual.
+        """
+        if not self.predict_enabled or context_type.value not in self.context_stats:
+            return None
+        priority = self.context_stats[context_type.value].predict(
+            self.min_samples, self.max_std, self.min_hit_rate, self.revalidate_every
+        )
+        if priority is None:
+            return None
+        try:
+            rules = rule_based_analysis(context_type.value, data, self.config)
+        except Exception as e:
+            print(f"Error in rule-based analysis: {e}")
+            return None
+        if rules["priority"] < priority:
+            return None
+        get_tracer().event("fallback", context=context_type.value, source="stats", reason="predicted")
+        return dict(rules, priority=priority, source="stats")
+
+    def report_metrics(self):
+        """Persist the goal metrics and statistics and record them in the trace for the metrics endpoint."""
+        metrics = dict(self.goals["metrics"])
+        if self.store:
+            try:
+                self.store.set_meta("performance_metrics", metrics)
+                self.store.set_meta("context_stats", stats_to_payload(self.context_stats))
+            except Exception as e:
+                print(f"Error saving agent metrics: {e}")
+        for context, stats in self.context_stats.items():
+            metrics[f"{context}_priority_mean"] = stats.mean
+            metrics[f"{context}_priority_std"] = stats.std
+            metrics[f"{context}_insight_hit_rate"] = stats.hit_rate
+        get_tracer().event("agent.metrics", **metrics)
+
     def get_agent_summary(self) -> str:
         """Get a summary of the agent's state and performance."""
         summary = [
@@ -246,17 +519,42 @@ Provide your analysis following the exact format shown in the example above."""
             "\nSub-Goals:",
             *[f"- {goal}" for goal in self.goals["sub_goals"]],
             "\nPerformance Metrics:",
-            f"- Relevance Score: {self.goals['metrics']['relevance_score']:.2f}",
             f"- User Engagement: {self.goals['metrics']['user_engagement']:.2f}",
             f"- Adaptation Rate: {self.goals['metrics']['adaptation_rate']:.2f}",
             "\nLearned Patterns:",
         ]
         
-        for context_type, patterns in self.memory["learned_patterns"].items():
-            if patterns:
-                summary.append(f"\n{context_type.upper()}:")
-                latest_pattern = patterns[-1]
-                summary.append(f"- Importance: {latest_pattern['importance']}")
-                summary.append(f"  Key Insights: {', '.join(latest_pattern['key_insights'][:2])}")
+        for context_type, latest_pattern in self.latest_patterns().items():
+            summary.append(f"\n{context_type.value.upper()}:")
+            summary.append(f"- Importance: {latest_pattern.importance}")
+            summary.append(f"  Key Insights: {', '.join(latest_pattern.key_insights[:2])}")
+            trend = self.priority_trend(context_type)
+            if trend:
+                average = sum(priority for _, priority in trend) / len(trend)
+                summary.append(f"  30-day Average Importance: {average:.1f} over {len(trend)} analyses")
+            stats = self.context_stats.get(context_type.value)
+            if stats and stats.count:
+                summary.append(f"  Learned Priority: {stats.mean:.1f} ± {stats.std:.1f} "
+                               f"(n={stats.count}, hit rate {stats.hit_rate:.0%})")
+                terms = ", ".join(term for term, _ in stats.top_terms())
+                if terms:
+                    summary.append(f"  Frequent Terms: {terms}")
         
-        return "\n".join(summary) 
\ No newline at end of file
+        return "\n".join(summary)
+
+    def latest_patterns(self) -> Dict[ContextType, PatternRecord]:
+        """Most recent learned pattern for each context that has one."""
+        if self.store:
+            return self.store.latest_patterns()
+        return latest_patterns(self.memory)
+
+    def priority_trend(self, context_type: ContextType, days: int = 30) -> List[Tuple[int, int]]:
+        """(timestamp, priority) of each analysis of a context in the last `days` days, oldest first."""
+        since = int(time.time()) - days * 86400
+        if self.store:
+            return self.store.priority_trend(context_type, since)
+        return [
+            (record.timestamp, record.priority)
+            for record in self.memory["interactions"]
+            if record.context_type == context_type and record.timestamp >= since
+        ] 
\ No newline at end of file
@@ -0,0 +1,35 @@
+from typing import Dict, Any
+import time
+
+DEFAULT_STAGES = {
+    "fetch": 20.0,
+    "analyze": 60.0,
+    "generate": 45.0,
+    "deliver": 20.0
+}
+
+class Budget:
+    """Latency budget for one run, split into per-stage allotments in seconds."""
+
+    def __init__(self, config: Dict[str, Any]):
+        settings = config.get('budget', {}) or {}
+        self.run_seconds = float(settings.get('run_seconds', 240))
+        self.stages = dict(DEFAULT_STAGES)
+        self.stages.update({name: float(seconds) for name, seconds in (settings.get('stages', {}) or {}).items()})
+        # Extra time the scheduler allows before killing a run that ignored its budget
+        self.grace_seconds = float(settings.get('grace_seconds', 30))
+        self.started = time.monotonic()
+
+    def stage(self, name: str) -> float:
+        """Allotment for one stage, never more than what is left of the run."""
+        return min(self.stages[name], self.remaining())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        return max(0.0, self.run_seconds - self.elapsed())
+
+    def analysis_deadline(self) -> float:
+        """Seconds left for fetching and analysis, keeping the delivery allotment in reserve."""
+        return max(0.0, self.remaining() - self.stages["deliver"])
@@ -0,0 +1,201 @@
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime
+import json
+import os
+import threading
+from src.agent import Agent, data_fingerprint
+from src.context_manager import ContextManager, ContextType
+from src.decide_priority import rule_based_analysis
+from src.generate_report import ReportGenerator
+from src.serialization import storage_backend
+from src.telegram_bot import TelegramBot
+from src.tracing import Tracer, bind_tracer, get_tracer
+
+HELP_TEXT = (
+    "Commands:\n"
+    "/update - the full report\n"
+    "/weather, /stocks, /news, /sports - one section\n"
+    "Replies use the data from the latest morning run."
+)
+
+class CommandPoller:
+    """Answers Telegram commands from the latest stored contexts and analyses.
+
+    Updates are long-polled with getUpdates. Replies reuse the stored analysis of the
+    same data, so the model is never run, and rendered replies are kept until a new
+    run writes different data. The offset of the next update is saved after each
+    reply so a restart does not answer the same command twice.
+
+    Polls are traced with the poller's own tracer, so they never mix with the spans of a
+    scheduled run in the same process, and polls that received nothing are not written.
+    """
+
+    def __init__(self, config: Dict[str, Any], bot: Optional[TelegramBot] = None, agent_class: type = Agent):
+        settings = config.get('commands', {}) or {}
+        self.config = config
+        self.agent_class = agent_class
+        self.poll_timeout = int(settings.get('poll_timeout', 30))
+        self.offset_file = settings.get('offset_file', os.path.join("logs", "telegram_offset.json"))
+        self.bot = bot or TelegramBot(
+            token=config['telegram']['bot_token'],
+            chat_id=config['telegram']['chat_id'],
+            api_url=config.get('endpoints', {}).get('telegram', "https://api.telegram.org"),
+            timeout=float(settings.get('send_timeout', 10))
+        )
+        self.offset = self._load_offset()
+        self.reply_cache: Dict[str, Tuple[Tuple[str, ...], str]] = {}
+        self._loaded_at: Optional[Tuple[float, ...]] = None
+        self.context_manager: Optional[ContextManager] = None
+        self.agent: Optional[Agent] = None
+        self.report_generator: Optional[ReportGenerator] = None
+        self._stop = threading.Event()
+        self.tracer = Tracer(config, run_id=f"commands-{datetime.now().strftime('%Y%m%dT%H%M%S')}")
+
+    def _load_offset(self) -> Optional[int]:
+        try:
+            with open(self.offset_file, 'r') as f:
+                return json.load(f)["offset"]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error loading Telegram offset: {e}")
+            return None
+
+    def _save_offset(self):
+        try:
+            os.makedirs(os.path.dirname(self.offset_file) or ".", exist_ok=True)
+            tmp_path = f"{self.offset_file}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({"offset": self.offset}, f)
+            os.replace(tmp_path, self.offset_file)
+        except Exception as e:
+            print(f"Error saving Telegram offset: {e}")
+
+    def _history_mtimes(self) -> Tuple[float, ...]:
+        """Modification times of the history files the loaded context manager and agent read."""
+        paths = self.context_manager.history_files() + self.agent.memory_files()
+        return tuple(os.path.getmtime(path) if os.path.exists(path) else 0.0 for path in paths)
+
+    def _refresh(self):
+        """Keep the loaded history, reloading it only after a run has written new files."""
+        if self.context_manager is None:
+            self._load()
+            self._loaded_at = self._history_mtimes()
+        elif storage_backend(self.config) != 'sqlite':
+            # With SQLite every lookup queries the database, so the first load stays current
+            mtimes = self._history_mtimes()
+            if mtimes != self._loaded_at:
+                self._load()
+                self._loaded_at = mtimes
+
+    def _load(self):
+        with get_tracer().span("commands.load_history"):
+            self.context_manager = ContextManager(self.config)
+            self.agent = self.agent_class(self.config, self.context_manager)
+            self.report_generator = ReportGenerator(self.config, self.context_manager, self.agent)
+
+    def _latest(self, context_types: List[ContextType]) -> Dict[ContextType, Any]:
+        """Latest stored data for each context that has any."""
+        data = {}
+        for context_type in context_types:
+            context = self.context_manager.latest_context(context_type)
+            if context is not None:
+                data[context_type] = context.data
+        return data
+
+    def _format_analysis(self, context_type: ContextType, data: Any) -> str:
+        # A run records the analysis of the data it stored; rules cover history without one.
+        # fallback_analysis is not used because its trace event would count as a run fallback
+        analysis = self.agent.cached_analysis(context_type, data)
+        if analysis is None:
+            try:
+                analysis = rule_based_analysis(context_type.value, data, self.config)
+            except Exception as e:
+                print(f"Error in rule-based analysis: {e}")
+                analysis = {"priority": 3, "insights": [], "actions": []}
+        lines = [f"Priority: {analysis.get('priority', 3)}"]
+        lines.extend(f"• {insight}" for insight in analysis.get("insights", []))
+        lines.extend(f"→ {action}" for action in analysis.get("actions", []))
+        return "\n".join(lines)
+
+    def reply_for(self, command: str) -> Tuple[str, bool]:
+        """Text answering a command, and whether it was reused from an earlier reply."""
+        self._refresh()
+        if command == "update":
+            context_types = list(ContextType)
+        elif command in {context_type.value for context_type in ContextType}:
+            context_types = [ContextType(command)]
+        else:
+            return HELP_TEXT, False
+
+        data = self._latest(context_types)
+        if not data:
+            return "No data yet. The first morning run has not finished.", False
+        fingerprints = tuple(f"{context_type.value}:{data_fingerprint(value)}" for context_type, value in data.items())
+        cached = self.reply_cache.get(command)
+        if cached and cached[0] == fingerprints:
+            return cached[1], True
+
+        if command == "update":
+            text = self.report_generator.report_header() + "\n\n".join(self.report_generator.render_sections(data))
+        else:
+            context_type = context_types[0]
+            text = (f"{self.report_generator.format_section(context_type, data[context_type])}\n\n"
+                    f"{self._format_analysis(context_type, data[context_type])}")
+        self.reply_cache[command] = (fingerprints, text.strip())
+        return text.strip(), False
+
+    def handle(self, update: Dict[str, Any]):
+        """Reply to one update if it is a command from the configured chat."""
+        message = update.get("message") or {}
+        text = (message.get("text") or "").strip()
+        chat_id = str((message.get("chat") or {}).get("id", ""))
+        if not text.startswith("/") or chat_id != str(self.bot.chat_id):
+            # Only the configured chat may request reports
+            return
+        # "/stocks@MyBot extra" -> "stocks"
+        command = text[1:].split()[0].split("@")[0].lower()
+        with get_tracer().span("telegram.command", command=command) as span:
+            reply, span["cached"] = self.reply_for(command)
+            if command == "update":
+                self.bot.send_morning_update(reply)
+            else:
+                self.bot.send_message(reply)
+
+    def poll_once(self) -> int:
+        """Fetch and answer one batch of updates; returns how many were received."""
+        updates = []
+        try:
+            with bind_tracer(self.tracer):
+                updates = self.bot.get_updates(self.offset, self.poll_timeout)
+                for update in updates:
+                    try:
+                        self.handle(update)
+                    except Exception as e:
+                        print(f"Error answering Telegram update {update.get('update_id')}: {e}")
+                    self.offset = update["update_id"] + 1
+                    self._save_offset()
+        finally:
+            if updates:
+                self.tracer.flush()
+            else:
+                # An empty long poll only measures how long nobody wrote
+                self.tracer.take()
+        return len(updates)
+
+    def run(self):
+        """Poll until stopped, backing off after errors."""
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"Error polling Telegram: {e}")
+                self._stop.wait(5)
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
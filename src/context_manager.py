@@ -1,9 +1,10 @@
 from typing import Dict, Any, List, Optional
 from enum import Enum
-import json
 import os
-from datetime import datetime
+import time
 from dataclasses import dataclass
+from src.serialization import storage_backend, storage_format, read_payload, write_payload, to_epoch, to_iso
+from src.tracing import get_tracer
 
 class ContextType(Enum):
     WEATHER = "weather"
@@ -11,12 +12,32 @@ class ContextType(Enum):
     NEWS = "news"
     SPORTS = "sports"
 
-@dataclass
+    @property
+    def code(self) -> int:
+        """Compact integer code used in binary logs."""
+        return _CONTEXT_CODES[self]
+
+    @classmethod
+    def from_code(cls, code: int) -> "ContextType":
+        return _CONTEXT_TYPES[code]
+
+_CONTEXT_CODES = {ContextType.WEATHER: 1, ContextType.STOCKS: 2, ContextType.NEWS: 3, ContextType.SPORTS: 4}
+_CONTEXT_TYPES = {code: context_type for context_type, code in _CONTEXT_CODES.items()}
+
+@dataclass(slots=True)
 class Context:
     type: ContextType
     data: Dict[str, Any]
     priority: int = 3
-    timestamp: Optional[str] = None
+    # Epoch seconds
+    timestamp: Optional[int] = None
+
+    def to_row(self) -> list:
+        return [self.type.code, self.timestamp, self.priority, self.data]
+
+    @classmethod
+    def from_row(cls, row: list) -> "Context":
+        return cls(ContextType.from_code(row[0]), row[3], row[2], row[1])
 
 class ContextManager:
     def __init__(self, config: Dict[str, Any]):
@@ -24,64 +45,107 @@ class ContextManager:
         self.contexts: Dict[ContextType, Context] = {}
         self.context_history: List[Context] = []
         self.active_context: Optional[ContextType] = None
-        self.context_file = os.path.join("logs", "context_history.json")
+        self.storage_format = storage_format(config)
+        self.store = None
+        self.legacy_context_file = os.path.join("logs", "context_history.json")
+        self.context_file = (
+            os.path.join("logs", "context_history.msgpack") if self.storage_format == 'msgpack'
+            else self.legacy_context_file
+        )
         
         # Create logs directory if it doesn't exist
         os.makedirs("logs", exist_ok=True)
         
-        # Load existing context history if available
-        self._load_context_history()
+        if storage_backend(config) == 'sqlite':
+            # Imported here because the store depends on the types defined in this module
+            from src.storage import SQLiteStore
+            # History stays in the database and is queried through its indexes instead of loaded
+            self.store = SQLiteStore(config)
+        else:
+            # Load existing context history if available
+            self._load_context_history()
+
+    def history_files(self) -> List[str]:
+        """Files the history is read from, for readers that reload it when a run changes it."""
+        return [self.context_file, self.legacy_context_file]
 
     def _load_context_history(self):
         """Load context history from file if it exists."""
         try:
-            if os.path.exists(self.context_file):
-                with open(self.context_file, 'r') as f:
-                    history_data = json.load(f)
-                    self.context_history = [
-                        Context(
-                            type=ContextType(ctx["type"]),
-                            data=ctx["data"],
-                            priority=ctx.get("priority", 3),
-                            timestamp=ctx.get("timestamp")
-                        )
-                        for ctx in history_data
-                    ]
+            if self.storage_format == 'msgpack' and os.path.exists(self.context_file):
+                rows = read_payload(self.context_file, 'msgpack')
+                self.context_history = [Context.from_row(row) for row in rows]
+            elif os.path.exists(self.legacy_context_file):
+                # JSON logs, including those written before the binary format existed
+                history_data = read_payload(self.legacy_context_file, 'json')
+                self.context_history = [
+                    Context(
+                        type=ContextType(ctx["type"]),
+                        data=ctx["data"],
+                        priority=ctx.get("priority", 3),
+                        timestamp=to_epoch(ctx.get("timestamp"))
+                    )
+                    for ctx in history_data
+                ]
         except Exception as e:
             print(f"Error loading context history: {e}")
 
     def _save_context_history(self):
         """Save context history to file."""
         try:
-            with open(self.context_file, 'w') as f:
-                json.dump([
-                    {
-                        "type": ctx.type.value,
-                        "data": ctx.data,
-                        "priority": ctx.priority,
-                        "timestamp": ctx.timestamp
-                    }
-                    for ctx in self.context_history
-                ], f, indent=2)
+            with get_tracer().span("persist.context_history", records=len(self.context_history)) as span:
+                if self.storage_format == 'msgpack':
+                    payload = [ctx.to_row() for ctx in self.context_history]
+                else:
+                    payload = [
+                        {
+                            "type": ctx.type.value,
+                            "data": ctx.data,
+                            "priority": ctx.priority,
+                            "timestamp": to_iso(ctx.timestamp)
+                        }
+                        for ctx in self.context_history
+                    ]
+                span["bytes"] = write_payload(self.context_file, payload, self.storage_format)
         except Exception as e:
             print(f"Error saving context history: {e}")
 
+    def _record(self, context: Context):
+        """Append a context to the history and persist it."""
+        if self.store:
+            self.store.add_context(context)
+            return
+        self.context_history.append(context)
+        self._save_context_history()
+
+    def flush(self):
+        """Write any batched history to storage."""
+        if self.store:
+            self.store.flush()
+
     def set_context(self, context_type: ContextType, data: Dict[str, Any], priority: int = 3):
         """Set context data for a specific type."""
         context = Context(
             type=context_type,
             data=data,
             priority=priority,
-            timestamp=datetime.now().isoformat()
+            timestamp=int(time.time())
         )
         self.contexts[context_type] = context
-        self.context_history.append(context)
-        self._save_context_history()
+        self._record(context)
 
     def get_context(self, context_type: ContextType) -> Optional[Context]:
         """Get context data for a specific type."""
         return self.contexts.get(context_type)
 
+    def latest_context(self, context_type: ContextType) -> Optional[Context]:
+        """Most recent recorded context of a type, from this run or the stored history."""
+        if context_type in self.contexts:
+            return self.contexts[context_type]
+        if self.store:
+            return self.store.latest_context(context_type)
+        return next((ctx for ctx in reversed(self.context_history) if ctx.type == context_type), None)
+
     def set_context_priority(self, context_type: ContextType, priority: int):
         """Update priority for a specific context type."""
         if context_type in self.contexts:
@@ -95,8 +159,7 @@ class ContextManager:
         """Update or create a new context."""
         context = Context(context_type, data)
         self.contexts[context_type] = context
-        self.context_history.append(context)
-        self._save_context_history()
+        self._record(context)
 
     def switch_context(self, context_type: ContextType) -> bool:
         """Switch to a different context."""
@@ -0,0 +1,215 @@
+from typing import Dict, Any, Callable, Iterable, Optional, Set
+from datetime import datetime, timedelta
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+SCHEDULE_TIME = "07:00"
+# Passed to the morning update process so its trace and deliveries belong to the scheduled run
+RUN_ID_ENV = "MORNING_UPDATE_RUN_ID"
+
+def scheduled_slot(now: datetime, at: str = SCHEDULE_TIME) -> datetime:
+    """The most recent scheduled run time at or before `now`."""
+    hour, minute = (int(part) for part in at.split(":"))
+    slot = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return slot if slot <= now else slot - timedelta(days=1)
+
+def run_id_for(slot: datetime) -> str:
+    """Run ID shared by every replica for one scheduled slot."""
+    return f"morning-update-{slot.strftime('%Y%m%dT%H%M')}"
+
+class RunCoordinator:
+    """Lets one scheduler replica do each scheduled run, using leases in a shared SQLite file.
+
+    The replica that claims a run renews its lease while the run is in progress. The other
+    replicas wait, and one of them takes the run over if the lease expires (the holder died)
+    or the run failed, up to max_attempts. A run that finished is never repeated.
+    """
+
+    def __init__(self, config: Dict[str, Any], replica_id: Optional[str] = None):
+        settings = config.get('coordination', {}) or {}
+        self.enabled = settings.get('enabled', False)
+        self.db_path = settings.get('db_path', os.path.join("logs", "coordination.db"))
+        self.replica_id = replica_id or settings.get('replica_id') or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = float(settings.get('lease_seconds', 60))
+        self.max_attempts = int(settings.get('max_attempts', 2))
+        self.standby_seconds = float(settings.get('standby_seconds', 600))
+        self.poll_seconds = float(settings.get('poll_seconds', 5))
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            # Transactions are explicit; the default rollback journal also works for a file shared between hosts
+            self._conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "run_id TEXT PRIMARY KEY, holder TEXT, status TEXT, attempt INTEGER, "
+                "expires REAL, started REAL, finished REAL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS deliveries ("
+                "run_id TEXT, section TEXT, sent REAL, PRIMARY KEY (run_id, section))"
+            )
+        return self._conn
+
+    def try_acquire(self, run_id: str) -> Optional[str]:
+        """Claim a run. Returns None if claimed, else why not: "held", "done" or "exhausted"."""
+        now = time.time()
+        conn = self.conn
+        # BEGIN IMMEDIATE takes the write lock, so only one replica can see the run as free
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT status, attempt, expires FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO runs (run_id, holder, status, attempt, expires, started) VALUES (?, ?, 'running', 1, ?, ?)",
+                    (run_id, self.replica_id, now + self.lease_seconds, now)
+                )
+                reason = None
+            else:
+                status, attempt, expires = row
+                if status == "done":
+                    reason = "done"
+                elif status == "running" and expires > now:
+                    reason = "held"
+                elif attempt >= self.max_attempts:
+                    reason = "exhausted"
+                else:
+                    # The previous holder failed or stopped renewing its lease
+                    conn.execute(
+                        "UPDATE runs SET holder = ?, status = 'running', attempt = ?, expires = ?, started = ?, "
+                        "finished = NULL WHERE run_id = ?",
+                        (self.replica_id, attempt + 1, now + self.lease_seconds, now, run_id)
+                    )
+                    reason = None
+            conn.execute("COMMIT")
+            return reason
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def renew(self, run_id: str) -> bool:
+        """Extend this replica's lease on a run. False if the lease was lost to another replica."""
+        cursor = self.conn.execute(
+            "UPDATE runs SET expires = ? WHERE run_id = ? AND holder = ? AND status = 'running'",
+            (time.time() + self.lease_seconds, run_id, self.replica_id)
+        )
+        return cursor.rowcount == 1
+
+    def release(self, run_id: str, succeeded: bool):
+        """Mark a claimed run as done, or as failed so another replica may retry it."""
+        self.conn.execute(
+            "UPDATE runs SET status = ?, expires = ?, finished = ? WHERE run_id = ? AND holder = ? AND status = 'running'",
+            ("done" if succeeded else "failed", time.time(), time.time(), run_id, self.replica_id)
+        )
+
+    def status(self, run_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            "SELECT holder, status, attempt, expires, started, finished FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("holder", "status", "attempt", "expires", "started", "finished"), row))
+
+    def delivered(self, run_id: str) -> Set[str]:
+        """Report sections already sent to Telegram for a run, by any attempt."""
+        rows = self.conn.execute("SELECT section FROM deliveries WHERE run_id = ?", (run_id,))
+        return {section for section, in rows}
+
+    def record_delivery(self, run_id: str, sections: Iterable[str]):
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO deliveries (run_id, section, sent) VALUES (?, ?, ?)",
+            [(run_id, section, time.time()) for section in sections]
+        )
+
+    def _heartbeat(self, run_id: str, stop: threading.Event):
+        while not stop.wait(self.lease_seconds / 3):
+            try:
+                if not self.renew(run_id):
+                    print(f"Lost the lease on {run_id} to another replica")
+                    return
+            except Exception as e:
+                print(f"Error renewing lease on {run_id}: {e}")
+
+    def run_once(self, run_id: str, job: Callable[[], bool]) -> bool:
+        """Run `job` if this replica wins the run, otherwise stand by to take over.
+
+        Returns True if this replica ran the job. The job returns whether it succeeded.
+        """
+        if not self.enabled:
+            job()
+            return True
+        deadline = time.time() + self.standby_seconds
+        waiting = False
+        while True:
+            try:
+                reason = self.try_acquire(run_id)
+            except sqlite3.Error as e:
+                print(f"Error claiming {run_id}: {e}")
+                reason = "held"
+            if reason is None:
+                break
+            if reason in ("done", "exhausted"):
+                print(f"Skipping {run_id}: {reason}")
+                return False
+            if time.time() >= deadline:
+                print(f"Stopped standing by for {run_id}")
+                return False
+            if not waiting:
+                print(f"{run_id} is held by another replica; standing by")
+                waiting = True
+            time.sleep(self.poll_seconds)
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(run_id, stop), daemon=True)
+        heartbeat.start()
+        succeeded = False
+        try:
+            succeeded = bool(job())
+        finally:
+            stop.set()
+            heartbeat.join()
+            try:
+                self.release(run_id, succeeded)
+            except sqlite3.Error as e:
+                print(f"Error releasing {run_id}: {e}")
+        return True
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+def delivered_sections(config: Dict[str, Any]) -> Set[str]:
+    """Sections an earlier attempt at the current scheduled run already sent, so a retry skips them.
+
+    Empty outside scheduled runs or without coordination, where runs are not retried.
+    """
+    run_id = os.getenv(RUN_ID_ENV)
+    coordinator = RunCoordinator(config)
+    if not (coordinator.enabled and run_id):
+        return set()
+    try:
+        return coordinator.delivered(run_id)
+    except sqlite3.Error as e:
+        print(f"Error reading deliveries of {run_id}: {e}")
+        return set()
+    finally:
+        coordinator.close()
+
+def record_delivery(config: Dict[str, Any], sections: Iterable[str]):
+    """Record sections the current scheduled run has sent."""
+    run_id = os.getenv(RUN_ID_ENV)
+    coordinator = RunCoordinator(config)
+    if not (coordinator.enabled and run_id):
+        return
+    try:
+        coordinator.record_delivery(run_id, sections)
+    except sqlite3.Error as e:
+        print(f"Error recording deliveries of {run_id}: {e}")
+    finally:
+        coordinator.close()
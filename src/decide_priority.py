@@ -1,12 +1,28 @@
-from typing import Dict, List, Any
-import openai
+from typing import Dict, List, Any, Optional
 import os
 
+SEVERE_WEATHER_TERMS = ("rain", "snow", "drizzle", "shower", "thunder", "hail", "storm")
+
+def move_threshold(config: Dict[str, Any]) -> float:
+    """Percent move that puts stocks first, shared by the rules and the market monitor."""
+    return float((config.get('market_monitor', {}) or {}).get('move_threshold', 5.0))
+
+def percent_change(quote: Dict[str, float]) -> Optional[float]:
+    """Percent change of a quote: change_percent if reported, else the dollar change against the previous close."""
+    if quote.get('change_percent') is not None:
+        return float(quote['change_percent'])
+    price, change = quote.get('price'), quote.get('change')
+    if price is None or change is None or price == change:
+        return None
+    return change / (price - change) * 100.0
+
 class PriorityDecider:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.api_key = os.getenv('OPENAI_API_KEY', config.get('openai_api_key', ''))
         if self.api_key:
+            # Imported here so rule-based runs never load the OpenAI client
+            import openai
             self.client = openai.OpenAI(api_key=self.api_key)
         else:
             self.client = None
@@ -58,4 +74,45 @@ Return only the section name that should appear first (Weather, Finance, Sports,
         except Exception as e:
             print(f"Error in priority decision: {e}")
             # Return default order if there's an error
-            return ['News', 'Weather', 'Finance', 'Sports'] 
\ No newline at end of file
+            return ['News', 'Weather', 'Finance', 'Sports']
+
+def rule_based_analysis(context_type: str, data: Any, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Score a context with the same rules the LLM is asked to follow, without any model."""
+    insights: List[str] = []
+    if context_type == "weather":
+        conditions = str(data.get('condition', data.get('conditions', ''))).lower()
+        alerts = data.get('alerts') or []
+        severe = [term for term in SEVERE_WEATHER_TERMS if term in conditions]
+        priority = 1 if severe or alerts else 4
+        insights = [f"Conditions: {conditions or 'unknown'}"] + [f"Alert: {alert}" for alert in alerts]
+    elif context_type == "stocks":
+        threshold = move_threshold(config)
+        big_moves = []
+        for symbol, quote in (data or {}).items():
+            change = percent_change(quote)
+            if change is not None and abs(change) >= threshold:
+                big_moves.append(f"{symbol} moved {change:+.2f}%")
+        priority = 1 if big_moves else 3
+        insights = big_moves or [f"No stock moved {threshold:g}% or more"]
+    elif context_type == "sports":
+        teams = [team for league in (config.get('sports') or {}).values() for team in league]
+        games = [game for league_games in (data or {}).values() for game in league_games]
+        team_games = [
+            game.get('game', game.get('summary', '')) for game in games
+            if any(team in game.get('game', game.get('summary', '')) for team in teams)
+        ]
+        priority = 2 if team_games else 4
+        insights = [f"Your team played: {game}" for game in team_games] or ["No games for your teams"]
+    elif context_type == "news":
+        headlines = data.get('headlines', []) if isinstance(data, dict) else (data or [])
+        important = [article['title'] for article in headlines if article.get('importance') == 'high']
+        priority = 1 if important else 2
+        insights = important or [article.get('title', '') for article in headlines]
+    else:
+        priority = 3
+    return {
+        "priority": priority,
+        "insights": insights[:2],
+        "actions": [],
+        "source": "rules"
+    }
@@ -1,19 +1,29 @@
 import requests
-import yfinance as yf
 from datetime import datetime
 from typing import Dict, List, Any
 import time
+from src.budget import Budget
+from src.news_index import NewsIndex
+from src.tracing import get_tracer
 
 class DataFetcher:
     def __init__(self, config):
         self.config = config
         self.news_api_key = config['api_keys']['news']
+        self.endpoints = config.get('endpoints', {}) or {}
+        # Per-request timeout so a stuck API cannot hold up the run
+        self.timeout = Budget(config).stages['fetch']
+        self.news_index = NewsIndex(config) if config.get('news_index', {}).get('enabled', True) else None
 
     def fetch_weather(self) -> Dict[str, Any]:
         """Fetch weather data for the configured city using Open-Meteo API."""
+        with get_tracer().span("fetch.weather") as span:
+            return self._fetch_weather(span)
+
+    def _fetch_weather(self, span: Dict[str, Any]) -> Dict[str, Any]:
         try:
             # First, get coordinates for the city using Open-Meteo's Geocoding API
-            geocoding_url = "https://geocoding-api.open-meteo.com/v1/search"
+            geocoding_url = self.endpoints.get('geocoding', "https://geocoding-api.open-meteo.com/v1/search")
             geocoding_params = {
                 'name': self.config['city'],
                 'count': 1,
@@ -21,8 +31,9 @@ class DataFetcher:
                 'format': 'json'
             }
             
-            geocoding_response = requests.get(geocoding_url, params=geocoding_params)
+            geocoding_response = requests.get(geocoding_url, params=geocoding_params, timeout=self.timeout)
             geocoding_data = geocoding_response.json()
+            span["bytes"] = len(geocoding_response.content)
             
             if not geocoding_data.get('results'):
                 raise ValueError(f"Could not find coordinates for city: {self.config['city']}")
@@ -32,7 +43,7 @@ class DataFetcher:
             longitude = location['longitude']
             
             # Now fetch weather data using the coordinates
-            weather_url = "https://api.open-meteo.com/v1/forecast"
+            weather_url = self.endpoints.get('weather', "https://api.open-meteo.com/v1/forecast")
             weather_params = {
                 'latitude': latitude,
                 'longitude': longitude,
@@ -40,8 +51,9 @@ class DataFetcher:
                 'timezone': 'auto'
             }
             
-            weather_response = requests.get(weather_url, params=weather_params)
+            weather_response = requests.get(weather_url, params=weather_params, timeout=self.timeout)
             weather_data = weather_response.json()
+            span["bytes"] += len(weather_response.content)
             
             # Map weather codes to descriptions
             weather_codes = {
@@ -83,10 +95,15 @@ class DataFetcher:
             }
         except Exception as e:
             print(f"Error fetching weather data: {e}")
+            span["error"] = str(e)
             return {}
 
     def fetch_stocks(self) -> Dict[str, Dict[str, float]]:
         """Return mock stock data for demonstration."""
+        with get_tracer().span("fetch.stocks") as span:
+            return self._fetch_stocks(span)
+
+    def _fetch_stocks(self, span: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
         try:
             # Mock data with realistic values
             mock_data = {
@@ -102,30 +119,51 @@ class DataFetcher:
             return stocks_data
         except Exception as e:
             print(f"Error fetching stock data: {e}")
+            span["error"] = str(e)
             return {}
 
     def fetch_news(self) -> List[Dict[str, str]]:
         """Fetch top news headlines."""
+        with get_tracer().span("fetch.news") as span:
+            return self._fetch_news(span)
+
+    def _fetch_news(self, span: Dict[str, Any]) -> List[Dict[str, str]]:
         try:
-            url = "https://newsapi.org/v2/top-headlines"
+            url = self.endpoints.get('news', "https://newsapi.org/v2/top-headlines")
             params = {
                 'country': 'us',
                 'apiKey': self.news_api_key
             }
-            response = requests.get(url, params=params)
+            response = requests.get(url, params=params, timeout=self.timeout)
             response.raise_for_status()
             data = response.json()
+            span["bytes"] = len(response.content)
             
-            return [{
+            articles = [{
                 'title': article['title'],
                 'description': article.get('description', '')
-            } for article in data['articles'][:5]]
+            } for article in data['articles']]
+            
+            # Drop stories already sent and merge near-duplicates before analysis; the index
+            # only records the articles once the report has been delivered
+            news_count = self.config.get('news_count', 5)
+            if self.news_index:
+                span["articles_fetched"] = len(articles)
+                articles = self.news_index.filter_articles(articles, limit=news_count)
+                span["articles_kept"] = len(articles)
+            
+            return articles[:news_count]
         except Exception as e:
             print(f"Error fetching news data: {e}")
+            span["error"] = str(e)
             return []
 
     def fetch_sports(self) -> Dict[str, List[Dict[str, str]]]:
         """Return mock sports data since we don't have a free sports API."""
+        with get_tracer().span("fetch.sports") as span:
+            return self._fetch_sports(span)
+
+    def _fetch_sports(self, span: Dict[str, Any]) -> Dict[str, List[Dict[str, str]]]:
         try:
             # Mock data for demonstration
             mock_data = {
@@ -141,4 +179,5 @@ class DataFetcher:
             return mock_data
         except Exception as e:
             print(f"Error fetching sports data: {e}")
+            span["error"] = str(e)
             return {} 
\ No newline at end of file
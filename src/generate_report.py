@@ -1,11 +1,14 @@
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, TYPE_CHECKING
 from datetime import datetime
 from src.context_manager import ContextManager, ContextType
-from src.agent import Agent
+from src.tracing import get_tracer
+
+if TYPE_CHECKING:
+    from src.agent import Agent
 
 class ReportGenerator:
-    def __init__(self, config: Dict[str, Any], context_manager: ContextManager, agent: Agent):
+    def __init__(self, config: Dict[str, Any], context_manager: ContextManager, agent: "Agent"):
         self.config = config
         self.openai_api_key = config['api_keys']['openai']
         os.environ['OPENAI_API_KEY'] = self.openai_api_key
@@ -17,13 +20,17 @@ class ReportGenerator:
         if not weather_data:
             return "Weather data unavailable"
         
-        return f"""WEATHER Update for {self.config['city']}:
+        # Live data from DataFetcher uses 'conditions' and has no precipitation or alerts
+        weather_text = f"""WEATHER Update for {self.config['city']}:
 • Temperature: {weather_data['temperature']}°C
-• Conditions: {weather_data['condition']}
+• Conditions: {weather_data.get('condition', weather_data.get('conditions'))}
 • Humidity: {weather_data['humidity']}%
-• Wind Speed: {weather_data['wind_speed']} m/s
-• Precipitation Chance: {weather_data['precipitation_chance']}%
-• Alerts: {', '.join(weather_data['alerts'])}"""
+• Wind Speed: {weather_data['wind_speed']} m/s"""
+        if 'precipitation_chance' in weather_data:
+            weather_text += f"\n• Precipitation Chance: {weather_data['precipitation_chance']}%"
+        if weather_data.get('alerts'):
+            weather_text += f"\n• Alerts: {', '.join(weather_data['alerts'])}"
+        return weather_text
 
     def _format_stocks(self, stocks_data: Dict[str, Dict[str, float]]) -> str:
         """Format stock information."""
@@ -38,6 +45,9 @@ class ReportGenerator:
 
     def _format_news(self, news_data: Dict[str, List[Dict[str, str]]]) -> str:
         """Format news information."""
+        # Live data from DataFetcher is a plain list of articles
+        if isinstance(news_data, list):
+            news_data = {'headlines': news_data}
         if not news_data or 'headlines' not in news_data:
             return "News data unavailable"
         
@@ -60,7 +70,7 @@ class ReportGenerator:
         if 'nba' in sports_data:
             sports_text += "\nNBA:\n"
             for game in sports_data['nba']:
-                sports_text += f"• {game['game']} ({game['status']})\n"
+                sports_text += self._format_game(game)
                 if 'highlight' in game:
                     sports_text += f"  {game['highlight']}\n"
         
@@ -68,7 +78,7 @@ class ReportGenerator:
         if 'nfl' in sports_data:
             sports_text += "\nNFL:\n"
             for game in sports_data['nfl']:
-                sports_text += f"• {game['game']} ({game['status']})\n"
+                sports_text += self._format_game(game)
                 if 'highlight' in game:
                     sports_text += f"  {game['highlight']}\n"
         
@@ -82,38 +92,58 @@ class ReportGenerator:
         
         return sports_text.strip()
 
+    def _format_game(self, game: Dict[str, str]) -> str:
+        """Format a finished game; live data only carries a one-line summary."""
+        if 'game' not in game:
+            return f"• {game.get('summary', '')}\n"
+        return f"• {game['game']} ({game['status']})\n"
+
     def generate_report(self, weather_data: Dict[str, Any], stocks_data: Dict[str, Dict[str, float]], 
                        news_data: List[Dict[str, str]], sports_data: Dict[str, List[Dict[str, str]]]) -> str:
         """Generate the complete morning report."""
-        # Generate report header
-        report = f"""Morning World Update - {datetime.now().strftime('%Y-%m-%d %H:%M')}
+        with get_tracer().span("render") as span:
+            report = self._render_report(weather_data, stocks_data, news_data, sports_data)
+            span["bytes"] = len(report.encode())
+        return report
+
+    def report_header(self) -> str:
+        return f"""Morning World Update - {datetime.now().strftime('%Y-%m-%d %H:%M')}
 ===========================================\n\n"""
 
-        # Get the latest priority analysis for each context
-        priorities = {}
-        for context_type in ContextType:
-            patterns = self.agent.memory["learned_patterns"].get(context_type.value, [])
-            if patterns:
-                latest_pattern = patterns[-1]
-                priorities[context_type] = latest_pattern.get("importance", 3)  # Default to 3 if not found
+    def format_section(self, context_type: ContextType, data: Any) -> str:
+        """Format one context's section of the report."""
+        formatters = {
+            ContextType.WEATHER: self._format_weather,
+            ContextType.STOCKS: self._format_stocks,
+            ContextType.NEWS: self._format_news,
+            ContextType.SPORTS: self._format_sports
+        }
+        try:
+            return formatters[context_type](data)
+        except Exception as e:
+            return f"Error formatting {context_type.value} section: {str(e)}"
 
-        # Create sections with their priorities
-        sections = {
-            ContextType.WEATHER: (self._format_weather, weather_data, priorities.get(ContextType.WEATHER, 3)),
-            ContextType.STOCKS: (self._format_stocks, stocks_data, priorities.get(ContextType.STOCKS, 3)),
-            ContextType.NEWS: (self._format_news, news_data, priorities.get(ContextType.NEWS, 3)),
-            ContextType.SPORTS: (self._format_sports, sports_data, priorities.get(ContextType.SPORTS, 3))
+    def render_sections(self, data_by_context: Dict[ContextType, Any], exclude: Iterable[ContextType] = ()) -> List[str]:
+        """Format each context's section, highest priority (lowest number) first."""
+        # Get the latest priority analysis for each context
+        priorities = {
+            context_type: pattern.importance
+            for context_type, pattern in self.agent.latest_patterns().items()
         }
-        
-        # Sort sections by priority (lower number = higher priority)
-        sorted_sections = sorted(sections.items(), key=lambda x: x[1][2])
-        
-        # Add each section in order of priority
-        for context_type, (formatter, data, _) in sorted_sections:
-            try:
-                section = formatter(data)
-                report += section + "\n\n"
-            except Exception as e:
-                report += f"Error formatting {context_type.value} section: {str(e)}\n\n"
+        excluded = set(exclude)
+        ordered = sorted(data_by_context, key=lambda context_type: priorities.get(context_type, 3))
+        return [
+            self.format_section(context_type, data_by_context[context_type])
+            for context_type in ordered
+            if context_type not in excluded
+        ]
 
-        return report.strip() 
\ No newline at end of file
+    def _render_report(self, weather_data: Dict[str, Any], stocks_data: Dict[str, Dict[str, float]],
+                       news_data: List[Dict[str, str]], sports_data: Dict[str, List[Dict[str, str]]]) -> str:
+        sections = self.render_sections({
+            ContextType.WEATHER: weather_data,
+            ContextType.STOCKS: stocks_data,
+            ContextType.NEWS: news_data,
+            ContextType.SPORTS: sports_data
+        })
+        return (self.report_header() + "\n\n".join(sections)).strip()
@@ -0,0 +1,141 @@
+from typing import Dict, Any, List, Iterable, Optional, Tuple
+from dataclasses import dataclass, field
+import hashlib
+import math
+import re
+
+TERM_PATTERN = re.compile(r"[a-z][a-z0-9%+.-]{2,}")
+STOPWORDS = frozenset({
+    "the", "and", "for", "with", "from", "are", "was", "were", "has", "have", "this", "that",
+    "will", "your", "you", "into", "over", "than", "its", "not", "but", "all", "any"
+})
+MAX_TERMS = 50
+RECENT_INSIGHTS = 32
+# Decayed weights are stored multiplied by a growing scale and renormalized past this
+MAX_SCALE = 1e6
+# Bumped when saved statistics may have learned from analyses that are no longer learned
+# from, so they are rebuilt from the stored analyses
+STATS_VERSION = 2
+
+def learns_from(source: Optional[str], confident: Optional[bool]) -> bool:
+    """Whether an analysis updates the statistics.
+
+    Only confident model output does. Predictions, cached and rule analyses would feed the
+    statistics back into themselves, and analyses without a source or confidence (older
+    memory files) are mostly the prompt's example answer copied by the model.
+    """
+    return source == "model" and confident is True
+
+def insight_terms(insight: str) -> List[str]:
+    return [term.strip(".-") for term in TERM_PATTERN.findall(insight.lower()) if term not in STOPWORDS]
+
+def insight_key(insight: str) -> str:
+    """Short key of an insight that ignores case, spacing and numbers, so "AAPL up 3%" repeats "AAPL up 5%"."""
+    normalized = " ".join(re.sub(r"\d+(?:\.\d+)?", "#", insight.lower()).split())
+    return hashlib.sha1(normalized.encode()).hexdigest()[:8]
+
+@dataclass(slots=True)
+class ContextStats:
+    """Online statistics of the analyses of one context, each updated in O(1) per analysis.
+
+    Priority mean and variance use Welford's algorithm. Insight terms and the share of
+    insights that repeat a recent one are decay-weighted, so recent analyses count most.
+    """
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    scale: float = 1.0
+    terms: Dict[str, float] = field(default_factory=dict)
+    hits: float = 0.0
+    seen: float = 0.0
+    recent: Dict[str, None] = field(default_factory=dict)
+    # Predictions used since the last model analysis
+    predictions: int = 0
+
+    def update(self, priority: int, insights: Iterable[str], decay: float = 0.9):
+        self.predictions = 0
+        self.count += 1
+        delta = priority - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (priority - self.mean)
+
+        # Instead of decaying every weight, new weights are added at a growing scale
+        self.scale /= decay
+        insights = [insight for insight in insights if insight]
+        for insight in insights:
+            for term in insight_terms(insight):
+                self.terms[term] = self.terms.get(term, 0.0) + self.scale
+        if self.scale > MAX_SCALE:
+            self.terms = {term: weight / self.scale for term, weight in self.terms.items()}
+            self.scale = 1.0
+        if len(self.terms) > 2 * MAX_TERMS:
+            # Amortized: pruning runs once per MAX_TERMS new terms at most
+            self.terms = dict(sorted(self.terms.items(), key=lambda item: -item[1])[:MAX_TERMS])
+
+        keys = [insight_key(insight) for insight in insights]
+        self.hits = self.hits * decay + sum(key in self.recent for key in keys)
+        self.seen = self.seen * decay + len(keys)
+        for key in keys:
+            self.recent.pop(key, None)
+            self.recent[key] = None
+        while len(self.recent) > RECENT_INSIGHTS:
+            del self.recent[next(iter(self.recent))]
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def hit_rate(self) -> float:
+        """Decay-weighted share of insights that repeated a recent insight."""
+        return self.hits / self.seen if self.seen else 0.0
+
+    def top_terms(self, n: int = 5) -> List[Tuple[str, float]]:
+        """Most frequent recent insight terms with their decayed weights."""
+        ranked = sorted(self.terms.items(), key=lambda item: -item[1])[:n]
+        return [(term, weight / self.scale) for term, weight in ranked]
+
+    def predict(self, min_samples: int, max_std: float, min_hit_rate: float,
+                revalidate_every: Optional[int] = None) -> Optional[int]:
+        """Priority expected for the next analysis, or None when the history is too short or varied.
+
+        After revalidate_every predictions in a row it is None too, so the model checks the context again.
+        """
+        if self.count < min_samples or self.std > max_std or self.hit_rate < min_hit_rate:
+            return None
+        if revalidate_every and self.predictions >= revalidate_every:
+            return None
+        return min(5, max(1, int(self.mean + 0.5)))
+
+    def to_row(self) -> list:
+        # Weights are stored at unit scale, rounded, to keep the memory file small
+        return [self.count, round(self.mean, 6), round(self.m2, 6), round(self.hits, 6), round(self.seen, 6),
+                {term: round(weight / self.scale, 4) for term, weight in self.terms.items()}, list(self.recent),
+                self.predictions]
+
+    @classmethod
+    def from_row(cls, row: list) -> "ContextStats":
+        count, mean, m2, hits, seen, terms, recent, predictions = row
+        return cls(count, mean, m2, 1.0, dict(terms), hits, seen, dict.fromkeys(recent), predictions)
+
+def stats_to_payload(stats: Dict[str, ContextStats]) -> Dict[str, Any]:
+    return {"version": STATS_VERSION, "contexts": {context: context_stats.to_row() for context, context_stats in stats.items()}}
+
+def stats_from_payload(payload: Optional[Dict[str, Any]]) -> Optional[Dict[str, ContextStats]]:
+    """Statistics saved by stats_to_payload, or None when there are none or they are from an older version."""
+    if not payload or payload.get("version") != STATS_VERSION:
+        return None
+    return {context: ContextStats.from_row(row) for context, row in payload["contexts"].items()}
+
+def rebuild_stats(analyses: Iterable[Tuple[str, int, List[str], Optional[str], Optional[bool]]],
+                  decay: float = 0.9) -> Dict[str, ContextStats]:
+    """Statistics from (context, priority, insights, source, confident) of stored analyses, oldest first."""
+    stats: Dict[str, ContextStats] = {}
+    for context, priority, insights, source, confident in analyses:
+        if learns_from(source, confident):
+            stats.setdefault(context, ContextStats()).update(priority, insights, decay)
+    return stats
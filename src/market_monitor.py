@@ -0,0 +1,167 @@
+from typing import Dict, Any, List, Optional
+import os
+import numpy as np
+from src.decide_priority import move_threshold, percent_change
+
+class MarketMonitor:
+    """Rolling per-symbol price store with vectorized movement detection."""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        settings = config.get('market_monitor', {}) or {}
+        self.window = int(settings.get('window', 30))
+        self.move_threshold = move_threshold(config) / 100.0
+        self.z_threshold = float(settings.get('z_threshold', 2.0))
+        self.history_file = settings.get('history_file', os.path.join("logs", "market_history.npz"))
+        self.symbols: List[str] = []
+        self.symbol_index: Dict[str, int] = {}
+        # One row per symbol, oldest observation in column 0, newest in the last column
+        self.prices = np.full((0, self.window), np.nan)
+        # Change reported by the data source for the latest observation, used until
+        # a symbol has enough history to compute its own return
+        self.reported_change = np.full(0, np.nan)
+        self._load_history()
+
+    def _load_history(self):
+        """Load the rolling price store from file if it exists."""
+        try:
+            if os.path.exists(self.history_file):
+                with np.load(self.history_file, allow_pickle=False) as stored:
+                    symbols = [str(s) for s in stored['symbols']]
+                    prices = stored['prices']
+                if prices.shape[1] >= self.window:
+                    prices = prices[:, -self.window:]
+                else:
+                    padding = np.full((prices.shape[0], self.window - prices.shape[1]), np.nan)
+                    prices = np.hstack([padding, prices])
+                self.symbols = symbols
+                self.symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+                self.prices = prices.astype(float)
+                self.reported_change = np.full(len(symbols), np.nan)
+        except Exception as e:
+            print(f"Error loading market history: {e}")
+
+    def _save_history(self):
+        """Save the rolling price store to file."""
+        try:
+            os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+            with open(self.history_file, 'wb') as f:
+                np.savez(f, symbols=np.array(self.symbols, dtype=str), prices=self.prices)
+        except Exception as e:
+            print(f"Error saving market history: {e}")
+
+    def _ensure_symbols(self, symbols: List[str]):
+        """Add rows for symbols that have not been seen before."""
+        new_symbols = [s for s in symbols if s not in self.symbol_index]
+        if not new_symbols:
+            return
+        for symbol in new_symbols:
+            self.symbol_index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        self.prices = np.vstack([self.prices, np.full((len(new_symbols), self.window), np.nan)])
+        self.reported_change = np.concatenate([self.reported_change, np.full(len(new_symbols), np.nan)])
+
+    def update(self, stocks_data: Dict[str, Dict[str, float]], save: bool = True):
+        """Append one observation per symbol from a fetch_stocks result."""
+        if not stocks_data:
+            return
+        symbols = list(stocks_data.keys())
+        self._ensure_symbols(symbols)
+
+        rows = np.fromiter((self.symbol_index[s] for s in symbols), dtype=np.intp, count=len(symbols))
+        prices = np.array([stocks_data[s].get('price', np.nan) for s in symbols], dtype=float)
+        # fetch_stocks reports the change in dollars, so it is converted against the previous close
+        changes = np.array([percent_change(stocks_data[s]) for s in symbols], dtype=float) / 100.0
+
+        # Shift every row left by one column; symbols missing from this fetch get a gap
+        self.prices[:, :-1] = self.prices[:, 1:]
+        self.prices[:, -1] = np.nan
+        self.prices[rows, -1] = prices
+        self.reported_change[:] = np.nan
+        self.reported_change[rows] = changes
+
+        if save:
+            self._save_history()
+
+    def compute_returns(self) -> np.ndarray:
+        """Simple returns between consecutive observations, shape (symbols, window - 1)."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.prices[:, 1:] / self.prices[:, :-1] - 1.0
+
+    def latest_returns(self) -> np.ndarray:
+        """Latest return per symbol, falling back to the source-reported change."""
+        returns = self.compute_returns()
+        latest = returns[:, -1] if returns.shape[1] else np.full(len(self.symbols), np.nan)
+        return np.where(np.isnan(latest), self.reported_change, latest)
+
+    def z_scores(self) -> np.ndarray:
+        """Z-score of the latest return against each symbol's earlier returns."""
+        returns = self.compute_returns()
+        if returns.shape[1] < 2:
+            return np.full(len(self.symbols), np.nan)
+        past = returns[:, :-1]
+        valid = ~np.isnan(past)
+        count = valid.sum(axis=1)
+        filled = np.where(valid, past, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = filled.sum(axis=1) / count
+            variance = np.where(valid, (past - mean[:, None]) ** 2, 0.0).sum(axis=1) / (count - 1)
+            std = np.sqrt(variance)
+            z = (returns[:, -1] - mean) / std
+        # Too little history or a flat series gives no meaningful z-score
+        z[(count < 2) | ~(std > 0)] = np.nan
+        return z
+
+    def get_alerts(self) -> List[Dict[str, Any]]:
+        """Symbols whose latest move crosses the move or z-score threshold."""
+        latest = self.latest_returns()
+        z = self.z_scores()
+        crossed = np.abs(latest) >= self.move_threshold
+        unusual = np.abs(z) >= self.z_threshold
+        flagged = np.flatnonzero(crossed | unusual)
+        # Largest moves first
+        flagged = flagged[np.argsort(-np.abs(np.nan_to_num(latest[flagged])), kind='stable')]
+
+        alerts = []
+        for i in flagged:
+            alerts.append({
+                'symbol': self.symbols[i],
+                'return': round(float(latest[i]) * 100, 2),
+                'z_score': None if np.isnan(z[i]) else round(float(z[i]), 2),
+                'threshold_crossed': bool(crossed[i])
+            })
+        return alerts
+
+    def get_priority(self) -> int:
+        """Numeric stocks priority (1-5, where 1 is highest) from the latest moves."""
+        if not self.symbols:
+            return 3
+        latest = np.abs(self.latest_returns())
+        z = np.abs(self.z_scores())
+        if np.isnan(latest).all():
+            return 3
+        if (latest >= self.move_threshold).any():
+            return 1
+        if (z >= self.z_threshold).any():
+            return 2
+        if (latest >= self.move_threshold / 2).any():
+            return 3
+        return 4
+
+    def analyze(self) -> Dict[str, Any]:
+        """Produce a stocks analysis in the same shape as Agent.analyze, without an LLM call."""
+        alerts = self.get_alerts()
+        insights = []
+        for alert in alerts:
+            direction = "up" if alert['return'] > 0 else "down"
+            insight = f"{alert['symbol']} {direction} {abs(alert['return']):.2f}%"
+            if alert['z_score'] is not None:
+                insight += f" (z-score {alert['z_score']:+.2f})"
+            insights.append(insight)
+        return {
+            "priority": self.get_priority(),
+            "insights": insights or ["No significant market movements"],
+            "actions": [f"Review {alert['symbol']} position" for alert in alerts[:2]],
+            "alerts": alerts,
+            "source": "monitor"
+        }
@@ -0,0 +1,197 @@
+from typing import Dict, Any, List, Optional, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+
+# Seconds; morning runs span milliseconds (parsing) to minutes (generation)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+HISTORY_FILES = (
+    "context_history.json", "context_history.msgpack", "agent_memory.json", "agent_memory.msgpack",
+    "morning_update.db", "news_index.json", "market_history.npz", "trace.jsonl"
+)
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), " ")}"'
+        for key, value in sorted(labels.items())
+    )
+    return "{" + ",".join(escaped) + "}"
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+class MetricsCollector:
+    """Aggregates the spans in the trace file into Prometheus metrics.
+
+    The trace file is read incrementally on each scrape, so counters cover every run
+    recorded in it, including runs from before the scheduler started.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        tracing = config.get('tracing', {}) or {}
+        self.trace_file = tracing.get('trace_file', os.path.join("logs", "trace.jsonl"))
+        self.logs_dir = os.path.dirname(self.trace_file) or "."
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._offset = 0
+        self.stage_latency: Dict[str, Histogram] = {}
+        self.run_latency = Histogram()
+        self.errors: Dict[str, int] = {}
+        self.runs: Dict[str, int] = {}
+        self.analyses: Dict[str, int] = {}
+        self.fallbacks: Dict[Tuple[str, str], int] = {}
+        self.tokens = {"input": 0, "output": 0}
+        self.last_run: Dict[str, float] = {}
+        self.agent_metrics: Dict[str, float] = {}
+
+    def refresh(self):
+        """Read spans appended to the trace file since the last call."""
+        with self._lock:
+            try:
+                if os.path.getsize(self.trace_file) < self._offset:
+                    # The file was rotated or truncated
+                    self._reset()
+                with open(self.trace_file, 'rb') as f:
+                    f.seek(self._offset)
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            # A record still being written; read it next time
+                            break
+                        self._offset += len(line)
+                        try:
+                            self._observe(json.loads(line))
+                        except (ValueError, KeyError, TypeError):
+                            continue
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"Error reading trace file for metrics: {e}")
+
+    def _observe(self, span: Dict[str, Any]):
+        name, attrs = span["name"], span.get("attrs", {})
+        seconds = (span.get("duration_ms") or 0.0) / 1000
+        if name == "fallback":
+            key = (attrs.get("source", "unknown"), attrs.get("reason", "unknown"))
+            self.fallbacks[key] = self.fallbacks.get(key, 0) + 1
+            self.analyses[key[0]] = self.analyses.get(key[0], 0) + 1
+            return
+        if name == "agent.metrics":
+            self.agent_metrics = {key: float(value) for key, value in attrs.items() if isinstance(value, (int, float))}
+            return
+        if name in ("first_message", "pipeline.deadline"):
+            return
+
+        self.stage_latency.setdefault(name, Histogram()).observe(seconds)
+        if span.get("status") == "error" or "error" in attrs:
+            self.errors[name] = self.errors.get(name, 0) + 1
+        self.tokens["input"] += attrs.get("input_tokens", 0)
+        self.tokens["output"] += attrs.get("output_tokens", 0)
+        if name == "parse" and span.get("status") == "ok":
+            self.analyses["model"] = self.analyses.get("model", 0) + 1
+        if name == "run":
+            self.run_latency.observe(seconds)
+            self.last_run = {"duration": seconds}
+        elif name == "scheduler.morning_update":
+            if "error" in attrs:
+                outcome = "timeout"
+            elif attrs.get("returncode", 0) != 0:
+                outcome = "failed"
+            else:
+                outcome = "ok"
+            self.runs[outcome] = self.runs.get(outcome, 0) + 1
+
+    def render(self) -> str:
+        """Current metrics in the Prometheus text exposition format."""
+        self.refresh()
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[Tuple[Dict[str, Any], float]]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels)} {value:g}")
+
+        def histogram(name: str, help_text: str, histograms: Dict[Optional[str], Histogram], label: str = ""):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in histograms.items():
+                base = {label: key} if label else {}
+                for bound, count in zip(BUCKETS, hist.counts):
+                    lines.append(f"{name}_bucket{_labels(dict(base, le=f'{bound:g}'))} {count}")
+                lines.append(f"{name}_bucket{_labels(dict(base, le='+Inf'))} {hist.count}")
+                lines.append(f"{name}_sum{_labels(base)} {hist.total:g}")
+                lines.append(f"{name}_count{_labels(base)} {hist.count}")
+
+        with self._lock:
+            histogram("morning_update_run_duration_seconds", "Duration of morning update runs.", {None: self.run_latency})
+            metric("morning_update_last_run_duration_seconds", "gauge", "Duration of the most recent run.",
+                   [({}, self.last_run["duration"])] if self.last_run else [])
+            metric("morning_update_runs_total", "counter", "Scheduled runs by outcome (ok, failed, timeout).",
+                   [({"outcome": outcome}, count) for outcome, count in sorted(self.runs.items())])
+            histogram("morning_update_stage_duration_seconds", "Latency of pipeline stages by span name.",
+                      dict(sorted(self.stage_latency.items())), label="stage")
+            metric("morning_update_stage_errors_total", "counter", "Failed stages, including fetches that returned no data.",
+                   [({"stage": stage}, count) for stage, count in sorted(self.errors.items())])
+            metric("morning_update_analyses_total", "counter", "Analyses by source (model, cache, rules, default).",
+                   [({"source": source}, count) for source, count in sorted(self.analyses.items())])
+            metric("morning_update_fallbacks_total", "counter", "Analyses that did not come from the model, by source and reason.",
+                   [({"source": source, "reason": reason}, count) for (source, reason), count in sorted(self.fallbacks.items())])
+            total = sum(self.analyses.values())
+            metric("morning_update_cache_hit_ratio", "gauge", "Share of all analyses served from cache.",
+                   [({}, self.analyses.get("cache", 0) / total)] if total else [])
+            metric("morning_update_tokens_total", "counter", "Tokens processed by the model.",
+                   [({"kind": kind}, count) for kind, count in self.tokens.items()])
+            metric("morning_update_agent_metric", "gauge", "Agent goal metrics from the most recent run.",
+                   [({"metric": key}, value) for key, value in sorted(self.agent_metrics.items())])
+
+        sizes = [
+            ({"file": name}, os.path.getsize(os.path.join(self.logs_dir, name)))
+            for name in HISTORY_FILES if os.path.exists(os.path.join(self.logs_dir, name))
+        ]
+        metric("morning_update_history_bytes", "gauge", "Size of history and memory files on disk.", sizes)
+        return "\n".join(lines) + "\n"
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.collector.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(config: Dict[str, Any]) -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics from a background thread when metrics are enabled in the config."""
+    settings = config.get('metrics', {}) or {}
+    if not settings.get('enabled', False):
+        return None
+    try:
+        server = ThreadingHTTPServer((settings.get('host', "127.0.0.1"), int(settings.get('port', 9108))), _MetricsHandler)
+    except OSError as e:
+        print(f"Error starting metrics server: {e}")
+        return None
+    server.collector = MetricsCollector(config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving metrics on http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+    return server
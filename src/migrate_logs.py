@@ -0,0 +1,68 @@
+"""Copy the JSON/msgpack context history and agent memory into the SQLite store.
+
+    python src/migrate_logs.py [--db logs/morning_update.db] [--force]
+
+Set `storage.backend: "sqlite"` in config/config.yaml afterwards. The log files are left in place.
+"""
+import argparse
+import os
+import sys
+import yaml
+from typing import Dict, Any
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent import load_memory
+from src.context_manager import ContextManager
+from src.storage import SQLiteStore
+
+def load_config() -> Dict[str, Any]:
+    """Load configuration from YAML file."""
+    with open("config/config.yaml", "r") as f:
+        return yaml.safe_load(f)
+
+def migrate(config: Dict[str, Any], force: bool = False) -> Dict[str, int]:
+    """Copy the file-backed history into SQLite and return the number of rows written per table."""
+    file_config = dict(config, storage=dict(config.get('storage', {}) or {}, backend='file'))
+    history = ContextManager(file_config).context_history
+    memory = load_memory(file_config)
+
+    # Large batches so the whole migration is a handful of transactions
+    store = SQLiteStore(dict(config, storage=dict(config.get('storage', {}) or {}, batch_size=5000)))
+    try:
+        existing = store.count("contexts") + store.count("analyses")
+        if existing and not force:
+            raise RuntimeError(f"{store.path} already has {existing} rows; use --force to migrate anyway")
+        for context in history:
+            store.add_context(context)
+        # Learned patterns are derived from analyses in SQLite, so only interactions are copied
+        for record in memory["interactions"]:
+            store.add_analysis(record)
+        store.flush()
+        if memory.get("performance_metrics"):
+            store.set_meta("performance_metrics", memory["performance_metrics"])
+        if memory.get("context_stats"):
+            store.set_meta("context_stats", memory["context_stats"])
+        return {"contexts": len(history), "analyses": len(memory["interactions"])}
+    finally:
+        store.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="database path (default storage.sqlite_path)")
+    parser.add_argument("--force", action="store_true", help="append even if the database already has rows")
+    args = parser.parse_args()
+
+    config = load_config()
+    if args.db:
+        config['storage'] = dict(config.get('storage', {}) or {}, sqlite_path=args.db)
+    try:
+        counts = migrate(config, force=args.force)
+        print(f"Migrated {counts['contexts']} contexts and {counts['analyses']} analyses")
+    except Exception as e:
+        print(f"Error migrating logs: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,158 +1,283 @@
+import asyncio
 import os
 import sys
+import time
 import yaml
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Tuple
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.fetch_data import DataFetcher
+from src.news_index import record_sent_news
 from src.generate_report import ReportGenerator
 from src.context_manager import ContextManager, ContextType
+from src.coordination import delivered_sections, record_delivery
 from src.agent import Agent
+from src.budget import Budget
+from src.market_monitor import MarketMonitor
+from src.pipeline import AsyncPipeline, print_analysis
 from src.telegram_bot import TelegramBot
+from src.tracing import configure_tracing, get_tracer
 
 def load_config() -> Dict[str, Any]:
     """Load configuration from YAML file."""
     with open("config/config.yaml", "r") as f:
         return yaml.safe_load(f)
 
-def main():
-    """Generate and display the morning update."""
+def main(no_model: bool = False) -> bool:
+    """Generate and display the morning update; returns whether it was delivered."""
+    tracer = configure_tracing()
     try:
         # Load configuration
-        config = load_config()
-        
+        with tracer.span("config_load"):
+            config = load_config()
+    except Exception as e:
+        print(f"Error generating morning update: {e}")
+        return False
+    tracer.configure(config)
+    if no_model:
+        # Cached analyses and rule-based priorities only; torch is never imported
+        config.setdefault('model', {})['enabled'] = False
+    
+    try:
+        with tracer.profile(), tracer.span("run"):
+            if config.get('pipeline', {}).get('async', True):
+                return run_update_async(config)
+            return run_update(config)
+    finally:
+        print(tracer.get_summary())
+        tracer.flush()
+
+def get_sample_data() -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """Return realistic sample data for weather, stocks, news and sports."""
+    weather_data = {
+        "temperature": 28,
+        "feels_like": 30,
+        "condition": "partly cloudy",
+        "precipitation_chance": 30,
+        "humidity": 65,
+        "wind_speed": 15,
+        "alerts": ["Heat advisory in effect until 6 PM"]
+    }
+
+    stocks_data = {
+        "AAPL": {
+            "price": 175.25,
+            "change": -3.75,
+            "change_percent": -2.1,
+            "volume": "85.2M",
+            "market_cap": "2.8T"
+        },
+        "TSLA": {
+            "price": 242.50,
+            "change": +8.30,
+            "change_percent": +3.5,
+            "volume": "120.5M",
+            "market_cap": "768.4B"
+        },
+        "MSFT": {
+            "price": 338.15,
+            "change": +2.45,
+            "change_percent": +0.7,
+            "volume": "22.1M",
+            "market_cap": "2.5T"
+        }
+    }
+
+    news_data = {
+        "headlines": [
+            {
+                "title": "Fed Signals Potential Interest Rate Cut in Coming Months",
+                "category": "Economy",
+                "importance": "high"
+            },
+            {
+                "title": "Major Tech Company Announces Revolutionary AI Chip",
+                "category": "Technology",
+                "importance": "medium"
+            },
+            {
+                "title": "Global Climate Summit Reaches Historic Agreement",
+                "category": "Environment",
+                "importance": "high"
+            }
+        ]
+    }
+
+    sports_data = {
+        "nba": [
+            {
+                "game": "Lakers vs Warriors",
+                "score": "120-115",
+                "status": "Final",
+                "highlight": "LeBron's triple-double leads Lakers"
+            }
+        ],
+        "nfl": [
+            {
+                "game": "Chiefs vs Bills",
+                "score": "24-17",
+                "status": "Final",
+                "highlight": "Mahomes throws 3 TDs in victory"
+            }
+        ],
+        "upcoming": [
+            {
+                "game": "Celtics vs Bucks",
+                "time": "7:30 PM EST",
+                "importance": "Crucial matchup for playoff seeding"
+            }
+        ]
+    }
+    
+    return weather_data, stocks_data, news_data, sports_data
+
+def collect_data(config: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], Any, Dict[str, Any]]:
+    """Fetch weather, stocks, news and sports data from the configured APIs."""
+    fetcher = DataFetcher(config)
+    return (
+        fetcher.fetch_weather(),
+        fetcher.fetch_stocks(),
+        fetcher.fetch_news(),
+        fetcher.fetch_sports()
+    )
+
+def get_fetchers(config: Dict[str, Any]) -> Dict[ContextType, Callable[[], Any]]:
+    """Per-context data sources for the async pipeline."""
+    if config.get('data_source', 'sample') == 'live':
+        fetcher = DataFetcher(config)
+        return {
+            ContextType.WEATHER: fetcher.fetch_weather,
+            ContextType.STOCKS: fetcher.fetch_stocks,
+            ContextType.NEWS: fetcher.fetch_news,
+            ContextType.SPORTS: fetcher.fetch_sports
+        }
+    weather_data, stocks_data, news_data, sports_data = get_sample_data()
+    return {
+        ContextType.WEATHER: lambda: weather_data,
+        ContextType.STOCKS: lambda: stocks_data,
+        ContextType.NEWS: lambda: news_data,
+        ContextType.SPORTS: lambda: sports_data
+    }
+
+def run_update_async(config: Dict[str, Any], agent_class: type = Agent) -> bool:
+    """Run the morning update with fetching, analysis and delivery overlapped per context.
+
+    Returns whether the report was delivered.
+    """
+    pipeline = None
+    try:
+        pipeline = AsyncPipeline(config, get_fetchers(config), agent_class)
+        asyncio.run(pipeline.run())
+        return pipeline.delivered
+    except Exception as e:
+        error_msg = f"Error generating morning update: {e}"
+        print(error_msg)
+        # Try to send error notification via Telegram
+        try:
+            pipeline.telegram_bot.send_message(f"❌ {error_msg}")
+        except:
+            pass
+        return False
+
+def run_update(config: Dict[str, Any], agent_class: type = Agent) -> bool:
+    """Analyze, render and deliver the morning update for a loaded config, one stage at a time.
+
+    Returns whether the report was delivered.
+    """
+    start = time.perf_counter()
+    budget = Budget(config)
+    try:
         # Initialize context manager and agent
         context_manager = ContextManager(config)
-        agent = Agent(config, context_manager)
+        agent = agent_class(config, context_manager)
+        market_monitor = MarketMonitor(config)
         
         # Initialize Telegram bot
         telegram_bot = TelegramBot(
             token=config['telegram']['bot_token'],
-            chat_id=config['telegram']['chat_id']
+            chat_id=config['telegram']['chat_id'],
+            api_url=config.get('endpoints', {}).get('telegram', "https://api.telegram.org"),
+            timeout=budget.stages['deliver']
         )
         
-        # More realistic test data
-        weather_data = {
-            "temperature": 28,
-            "feels_like": 30,
-            "condition": "partly cloudy",
-            "precipitation_chance": 30,
-            "humidity": 65,
-            "wind_speed": 15,
-            "alerts": ["Heat advisory in effect until 6 PM"]
-        }
-        
-        stocks_data = {
-            "AAPL": {
-                "price": 175.25,
-                "change": -3.75,
-                "change_percent": -2.1,
-                "volume": "85.2M",
-                "market_cap": "2.8T"
-            },
-            "TSLA": {
-                "price": 242.50,
-                "change": +8.30,
-                "change_percent": +3.5,
-                "volume": "120.5M",
-                "market_cap": "768.4B"
-            },
-            "MSFT": {
-                "price": 338.15,
-                "change": +2.45,
-                "change_percent": +0.7,
-                "volume": "22.1M",
-                "market_cap": "2.5T"
-            }
-        }
+        # Realistic sample data, or live data from the configured APIs
+        if config.get('data_source', 'sample') == 'live':
+            weather_data, stocks_data, news_data, sports_data = collect_data(config)
+        else:
+            weather_data, stocks_data, news_data, sports_data = get_sample_data()
         
-        news_data = {
-            "headlines": [
-                {
-                    "title": "Fed Signals Potential Interest Rate Cut in Coming Months",
-                    "category": "Economy",
-                    "importance": "high"
-                },
-                {
-                    "title": "Major Tech Company Announces Revolutionary AI Chip",
-                    "category": "Technology",
-                    "importance": "medium"
-                },
-                {
-                    "title": "Global Climate Summit Reaches Historic Agreement",
-                    "category": "Environment",
-                    "importance": "high"
-                }
-            ]
-        }
-        
-        sports_data = {
-            "nba": [
-                {
-                    "game": "Lakers vs Warriors",
-                    "score": "120-115",
-                    "status": "Final",
-                    "highlight": "LeBron's triple-double leads Lakers"
-                }
-            ],
-            "nfl": [
-                {
-                    "game": "Chiefs vs Bills",
-                    "score": "24-17",
-                    "status": "Final",
-                    "highlight": "Mahomes throws 3 TDs in victory"
-                }
-            ],
-            "upcoming": [
-                {
-                    "game": "Celtics vs Bucks",
-                    "time": "7:30 PM EST",
-                    "importance": "Crucial matchup for playoff seeding"
-                }
-            ]
-        }
+        # Feed the rolling price store and score market movements without the model
+        market_monitor.update(stocks_data)
+        stocks_analysis = market_monitor.analyze()
         
         # Update contexts with realistic data
         context_manager.set_context(ContextType.WEATHER, weather_data)
-        context_manager.set_context(ContextType.STOCKS, stocks_data)
+        context_manager.set_context(ContextType.STOCKS, stocks_data, priority=stocks_analysis["priority"])
         context_manager.set_context(ContextType.NEWS, news_data)
         context_manager.set_context(ContextType.SPORTS, sports_data)
         
-        # Analyze each context
-        for context_type in ContextType:
+        # Analyze each context. Inference cannot be interrupted here, so the budget is checked
+        # before each context and the rest fall back once the time for analysis is spent
+        context_types = list(ContextType)
+        deadline_reached = False
+        for index, context_type in enumerate(context_types):
             context = context_manager.get_context(context_type)
             if context:
-                print(f"\nAnalyzing {context_type.value.upper()}...")
-                print("-" * 50)
-                analysis = agent.analyze_context(context_type, context.data)
-                print(f"Priority: {analysis.get('priority', 'N/A')}")
-                print("\nInsights:")
-                for insight in analysis.get('insights', []):
-                    print(f"- {insight}")
-                print("\nActions:")
-                for action in analysis.get('actions', []):
-                    print(f"- {action}")
-                print("-" * 50)
+                if context_type == ContextType.STOCKS:
+                    analysis = agent.record_analysis(context_type, stocks_analysis, stocks_data)
+                elif deadline_reached or budget.analysis_deadline() <= 0:
+                    if not deadline_reached:
+                        deadline_reached = True
+                        pending = [c.value for c in context_types[index:] if c != ContextType.STOCKS]
+                        get_tracer().event("pipeline.deadline", elapsed_s=round(budget.elapsed(), 3), pending=pending)
+                        print(f"Run budget reached after {budget.elapsed():.1f}s; still pending: {', '.join(pending)}")
+                    analysis = agent.fallback_analysis(context_type, context.data, "deadline")
+                    analysis = agent.record_analysis(context_type, analysis, context.data)
+                else:
+                    analysis = agent.analyze_context(context_type, context.data)
+                print_analysis(context_type, analysis)
+        
+        # Write batched history before the summary and report read it back
+        context_manager.flush()
         
         # Get agent summary
         print("\nAGENT SUMMARY")
         print("=" * 50)
         print(agent.get_agent_summary())
         print("=" * 50)
+        agent.report_metrics()
         
         # Generate the report
         report_generator = ReportGenerator(config, context_manager, agent)
         report = report_generator.generate_report(weather_data, stocks_data, news_data, sports_data)
         
-        # Send the report via Telegram
-        if not telegram_bot.send_morning_update(report):
+        # Send the report via Telegram, without the sections an earlier attempt at this
+        # scheduled run already sent
+        sent_before = {ContextType(section) for section in delivered_sections(config)}
+        if sent_before:
+            rest = "\n\n".join(report_generator.render_sections({
+                ContextType.WEATHER: weather_data,
+                ContextType.STOCKS: stocks_data,
+                ContextType.NEWS: news_data,
+                ContextType.SPORTS: sports_data
+            }, exclude=sent_before))
+            sent = telegram_bot.send_morning_update(rest, continued=True) if rest else True
+        else:
+            sent = telegram_bot.send_morning_update(report)
+        if not sent:
             print("Error sending morning update via Telegram")
+        else:
+            get_tracer().event("first_message", elapsed_ms=round((time.perf_counter() - start) * 1000, 3))
+            record_delivery(config, [context_type.value for context_type in ContextType if context_type not in sent_before])
+            if ContextType.NEWS not in sent_before:
+                record_sent_news(config, news_data)
         
         # Print the report to console
         print(report)
+        return sent
         
     except Exception as e:
         error_msg = f"Error generating morning update: {e}"
@@ -162,6 +287,8 @@ def main():
             telegram_bot.send_message(f"❌ {error_msg}")
         except:
             pass
+        return False
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    # A failed run exits non-zero so the scheduler can let another replica retry it
+    sys.exit(0 if main(no_model="--no-model" in sys.argv[1:]) else 1) 
\ No newline at end of file
@@ -0,0 +1,200 @@
+from typing import Dict, Any, List, Optional
+import base64
+import json
+import os
+import re
+import time
+import zlib
+import numpy as np
+
+# Mersenne prime for the universal hash family; keeps a*x + b inside uint64
+_PRIME = (1 << 31) - 1
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+class NewsIndex:
+    """Local MinHash/LSH index of previously seen headlines."""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        settings = config.get('news_index', {}) or {}
+        self.index_file = settings.get('index_file', os.path.join("logs", "news_index.json"))
+        self.num_perm = int(settings.get('num_perm', 64))
+        self.bands = int(settings.get('bands', 16))
+        self.rows = self.num_perm // self.bands
+        self.shingle_size = int(settings.get('shingle_size', 1))
+        self.threshold = float(settings.get('similarity_threshold', 0.5))
+        self.max_entries = int(settings.get('max_entries', 20000))
+        self.max_age_days = float(settings.get('max_age_days', 7))
+
+        # Fixed seed so signatures stay comparable with the persisted index
+        rng = np.random.default_rng(1)
+        self._a = rng.integers(1, _PRIME, size=self.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=self.num_perm, dtype=np.uint64)
+
+        self.titles: List[str] = []
+        self.timestamps: List[float] = []
+        self._signatures = np.empty((64, self.num_perm), dtype=np.uint32)
+        self.buckets: Dict[bytes, List[int]] = {}
+        self._load_index()
+
+    @property
+    def signatures(self) -> np.ndarray:
+        """Signatures of the stored headlines, one row per entry."""
+        return self._signatures[:len(self.titles)]
+
+    def _set_signatures(self, signatures: np.ndarray):
+        capacity = max(64, 2 * len(signatures))
+        self._signatures = np.empty((capacity, self.num_perm), dtype=np.uint32)
+        self._signatures[:len(signatures)] = signatures
+
+    def _shingles(self, text: str) -> List[int]:
+        """Hash word n-grams of the normalized text."""
+        words = _WORD_RE.findall(text.lower())
+        if len(words) < self.shingle_size:
+            grams = [" ".join(words)] if words else []
+        else:
+            grams = [" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+        return [zlib.crc32(gram.encode()) for gram in set(grams)]
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a headline."""
+        shingles = np.array(self._shingles(text), dtype=np.uint64) % _PRIME
+        if shingles.size == 0:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint32)
+        hashed = (self._a[:, None] * shingles[None, :] + self._b[:, None]) % _PRIME
+        return hashed.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [bytes([band]) + signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                for band in range(self.bands)]
+
+    def _add_signature(self, title: str, signature: np.ndarray, timestamp: float) -> int:
+        entry_id = len(self.titles)
+        if entry_id == len(self._signatures):
+            self._set_signatures(self._signatures)
+        self._signatures[entry_id] = signature
+        self.titles.append(title)
+        self.timestamps.append(timestamp)
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(entry_id)
+        return entry_id
+
+    def _rebuild_buckets(self):
+        self.buckets = {}
+        for entry_id, signature in enumerate(self.signatures):
+            for key in self._band_keys(signature):
+                self.buckets.setdefault(key, []).append(entry_id)
+
+    def find_similar(self, signature: np.ndarray) -> Optional[int]:
+        """Return the id of the most similar stored headline above the threshold."""
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+        if not candidates:
+            return None
+        ids = np.fromiter(candidates, dtype=np.intp, count=len(candidates))
+        similarity = (self.signatures[ids] == signature[None, :]).mean(axis=1)
+        best = int(similarity.argmax())
+        if similarity[best] >= self.threshold:
+            return int(ids[best])
+        return None
+
+    def add(self, title: str, timestamp: Optional[float] = None) -> int:
+        """Add a headline to the index without checking for duplicates."""
+        return self._add_signature(title, self.signature(title), timestamp or time.time())
+
+    def filter_articles(self, articles: List[Dict[str, Any]], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Drop articles already sent and collapse near-duplicate clusters into one item.
+
+        The index is not changed; add the articles with mark_sent once they have been delivered.
+        """
+        kept: List[Dict[str, Any]] = []
+        batch_signatures: List[np.ndarray] = []
+        batch_buckets: Dict[bytes, List[int]] = {}
+        for article in articles:
+            title = article.get('title') or ''
+            signature = self.signature(title)
+            if self.find_similar(signature) is not None:
+                # The story was already sent in an earlier run
+                continue
+            keys = self._band_keys(signature)
+            candidates = {i for key in keys for i in batch_buckets.get(key, ())}
+            similarity = {i: (batch_signatures[i] == signature).mean() for i in candidates}
+            match = max(similarity, key=similarity.get, default=None)
+            if match is not None and similarity[match] >= self.threshold:
+                # Another version of a story from this batch
+                kept[match]['cluster_size'] += 1
+                continue
+            if limit is not None and len(kept) >= limit:
+                continue
+            for key in keys:
+                batch_buckets.setdefault(key, []).append(len(kept))
+            batch_signatures.append(signature)
+            kept.append(dict(article, cluster_size=1))
+        return kept
+
+    def mark_sent(self, articles: List[Dict[str, Any]], save: bool = True):
+        """Add delivered articles so later runs skip them and their near-duplicates."""
+        now = time.time()
+        for article in articles:
+            self._add_signature(article.get('title') or '', self.signature(article.get('title') or ''), now)
+        if save:
+            self.prune()
+            self._save_index()
+
+    def prune(self):
+        """Drop entries past the retention age or beyond the size limit."""
+        cutoff = time.time() - self.max_age_days * 86400
+        keep = [i for i, ts in enumerate(self.timestamps) if ts >= cutoff][-self.max_entries:]
+        if len(keep) == len(self.titles):
+            return
+        signatures = self.signatures[keep]
+        self.titles = [self.titles[i] for i in keep]
+        self.timestamps = [self.timestamps[i] for i in keep]
+        self._set_signatures(signatures)
+        self._rebuild_buckets()
+
+    def _load_index(self):
+        """Load the headline index from file if it exists."""
+        try:
+            if os.path.exists(self.index_file):
+                with open(self.index_file, 'r') as f:
+                    stored = json.load(f)
+                if stored.get("num_perm") != self.num_perm:
+                    return
+                self._set_signatures(np.frombuffer(
+                    b"".join(base64.b64decode(entry["signature"]) for entry in stored["entries"]),
+                    dtype=np.uint32
+                ).reshape(-1, self.num_perm))
+                self.titles = [entry["title"] for entry in stored["entries"]]
+                self.timestamps = [entry["timestamp"] for entry in stored["entries"]]
+                self._rebuild_buckets()
+        except Exception as e:
+            print(f"Error loading news index: {e}")
+
+    def _save_index(self):
+        """Save the headline index to file."""
+        try:
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            with open(self.index_file, 'w') as f:
+                json.dump({
+                    "num_perm": self.num_perm,
+                    "entries": [
+                        {"title": title, "timestamp": ts, "signature": base64.b64encode(signature.tobytes()).decode()}
+                        for title, ts, signature in zip(self.titles, self.timestamps, self.signatures)
+                    ]
+                }, f)
+        except Exception as e:
+            print(f"Error saving news index: {e}")
+
+def record_sent_news(config: Dict[str, Any], news_data: Any):
+    """Add the news articles of a delivered report to the index.
+
+    Only live articles (a list from DataFetcher) are recorded, not the built-in sample data.
+    """
+    if not (config.get('news_index', {}) or {}).get('enabled', True) or not isinstance(news_data, list) or not news_data:
+        return
+    try:
+        NewsIndex(config).mark_sent(news_data)
+    except Exception as e:
+        print(f"Error recording sent news: {e}")
@@ -0,0 +1,252 @@
+from typing import Dict, Any, Callable, List, Optional, Set
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.agent import Agent, fallback_reason
+from src.budget import Budget
+from src.context_manager import ContextManager, ContextType
+from src.coordination import delivered_sections, record_delivery
+from src.generate_report import ReportGenerator
+from src.market_monitor import MarketMonitor
+from src.news_index import record_sent_news
+from src.telegram_bot import TelegramBot
+from src.worker_pool import AnalysisPool
+from src.tracing import get_tracer
+
+def print_analysis(context_type: ContextType, analysis: Dict[str, Any]):
+    """Print one context's analysis to the console."""
+    print(f"\nAnalyzing {context_type.value.upper()}...")
+    print("-" * 50)
+    print(f"Priority: {analysis.get('priority', 'N/A')}")
+    print("\nInsights:")
+    for insight in analysis.get('insights', []):
+        print(f"- {insight}")
+    print("\nActions:")
+    for action in analysis.get('actions', []):
+        print(f"- {action}")
+    print("-" * 50)
+
+class AsyncPipeline:
+    """Moves each context through fetch, analysis and rendering as soon as its input is ready.
+
+    Blocking fetches and Telegram calls run on an I/O thread pool and model inference on a
+    dedicated executor. All context, memory and report state is only touched on the event loop.
+    """
+
+    def __init__(self, config: Dict[str, Any], fetchers: Dict[ContextType, Callable[[], Any]], agent_class: type = Agent):
+        settings = config.get('pipeline', {}) or {}
+        self.config = config
+        self.fetchers = fetchers
+        self.inference_workers = max(1, int(settings.get('inference_workers', 1)))
+        # Worker processes that each load the model; 0 runs inference in this process
+        self.worker_processes = int((config.get('workers', {}) or {}).get('processes', 0))
+        if self.worker_processes:
+            self.inference_workers = self.worker_processes
+        self.agent_class = agent_class
+        # Fetched contexts waiting for analysis before further fetches pause
+        self.queue_size = max(1, int(settings.get('queue_size', 2)))
+        self.early_send_priority = int(settings.get('early_send_priority', 2))
+
+        self.context_manager = ContextManager(config)
+        self.agent = agent_class(config, self.context_manager)
+        self.market_monitor = MarketMonitor(config)
+        self.report_generator = ReportGenerator(config, self.context_manager, self.agent)
+        self.budget = Budget(config)
+        self.telegram_bot = TelegramBot(
+            token=config['telegram']['bot_token'],
+            chat_id=config['telegram']['chat_id'],
+            api_url=config.get('endpoints', {}).get('telegram', "https://api.telegram.org"),
+            timeout=self.budget.stages['deliver']
+        )
+
+        self.data: Dict[ContextType, Any] = {}
+        self.analyses: Dict[ContextType, Dict[str, Any]] = {}
+        self.early_section: Optional[ContextType] = None
+        self.time_to_first_message: Optional[float] = None
+        # Sections sent by this run, and by an earlier attempt at the same scheduled run
+        self.sent_sections: Set[ContextType] = set()
+        self.sent_before: Set[ContextType] = set()
+        self.delivered = False
+
+    async def run(self) -> str:
+        """Run the pipeline and return the full report."""
+        self._loop = asyncio.get_running_loop()
+        self._start = time.perf_counter()
+        self.budget.started = time.monotonic()
+        self.sent_before = {ContextType(section) for section in delivered_sections(self.config)}
+        if self.sent_before:
+            print(f"Already sent by an earlier attempt: {', '.join(sorted(c.value for c in self.sent_before))}")
+        self._io = ThreadPoolExecutor(max_workers=len(self.fetchers) + 1, thread_name_prefix="io")
+        self._early_delivery: Optional[asyncio.Task] = None
+        self._pool = None
+        if self.agent.use_model and self.worker_processes:
+            # Workers load the model in their initializer; this process never does
+            self._pool = AnalysisPool(self.config, self.agent_class, self.worker_processes)
+            self._inference = self._pool.executor
+            self._model_ready = None
+        else:
+            self._inference = ThreadPoolExecutor(max_workers=self.inference_workers, thread_name_prefix="inference")
+            # Load the model while the first fetches are in flight
+            self._model_ready = (
+                self._loop.run_in_executor(self._inference, self.agent._ensure_model) if self.agent.use_model else None
+            )
+
+        # Contexts that were urgent last run are analyzed first so they can be sent early
+        self._predicted = {
+            context_type: pattern.importance for context_type, pattern in self.agent.latest_patterns().items()
+        }
+        queue: asyncio.PriorityQueue = asyncio.PriorityQueue(maxsize=self.queue_size)
+        producers = [asyncio.create_task(self._fetch(context_type, fetch, queue)) for context_type, fetch in self.fetchers.items()]
+        consumers = [asyncio.create_task(self._analyze_worker(queue)) for _ in range(self.inference_workers)]
+        try:
+            # Delivery keeps its allotment at the end of the run
+            await asyncio.wait_for(self._drain(producers, queue), timeout=self.budget.analysis_deadline())
+        except asyncio.TimeoutError:
+            pending = [context_type.value for context_type in self.fetchers if context_type not in self.analyses]
+            get_tracer().event("pipeline.deadline", elapsed_s=round(self.budget.elapsed(), 3), pending=pending)
+            print(f"Run budget reached after {self.budget.elapsed():.1f}s; still pending: {', '.join(pending)}")
+        finally:
+            for task in producers + consumers:
+                task.cancel()
+            await asyncio.gather(*producers, *consumers, return_exceptions=True)
+            # Inference already running cannot be interrupted; its result is discarded, and
+            # worker processes still generating are terminated
+            if self._pool:
+                self._pool.shutdown(wait=False)
+            else:
+                self._inference.shutdown(wait=False, cancel_futures=True)
+
+        # Sections fetched but not analyzed in time are sent with a fallback analysis
+        for context_type, data in self.data.items():
+            if context_type not in self.analyses:
+                analysis = self.agent.fallback_analysis(context_type, data, "deadline")
+                self.analyses[context_type] = self.agent.record_analysis(context_type, analysis, data)
+
+        try:
+            return await self._finish()
+        finally:
+            self._io.shutdown(wait=True)
+
+    async def _drain(self, producers, queue: asyncio.PriorityQueue):
+        await asyncio.gather(*producers)
+        await queue.join()
+
+    async def _fetch(self, context_type: ContextType, fetch: Callable[[], Any], queue: asyncio.PriorityQueue):
+        """Fetch one context, store it and queue it for analysis."""
+        try:
+            data = await asyncio.wait_for(self._loop.run_in_executor(self._io, fetch), timeout=self.budget.stage('fetch'))
+        except asyncio.TimeoutError:
+            print(f"Error fetching {context_type.value} data: no response within {self.budget.stages['fetch']:g}s")
+            return
+        except Exception as e:
+            print(f"Error fetching {context_type.value} data: {e}")
+            return
+        self.data[context_type] = data
+
+        if context_type == ContextType.STOCKS:
+            # Market movements are scored by the rolling price store, not the model
+            self.market_monitor.update(data)
+            analysis = self.market_monitor.analyze()
+            self.context_manager.set_context(context_type, data, priority=analysis["priority"])
+        else:
+            analysis = None
+            self.context_manager.set_context(context_type, data)
+        # Blocks while analysis is behind; stocks are already analyzed and go first
+        predicted = 0 if analysis else self._predicted.get(context_type, 3)
+        await queue.put((predicted, context_type.code, context_type, data, analysis))
+
+    async def _analyze_worker(self, queue: asyncio.PriorityQueue):
+        while True:
+            _, _, context_type, data, analysis = await queue.get()
+            try:
+                if analysis is None:
+                    analysis = await self._analyze(context_type, data)
+                self.analyses[context_type] = self.agent.record_analysis(context_type, analysis, data)
+                print_analysis(context_type, analysis)
+                self._maybe_send_early(context_type, analysis)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in context analysis: {e}")
+            finally:
+                queue.task_done()
+
+    async def _analyze(self, context_type: ContextType, data: Any) -> Dict[str, Any]:
+        """Analyze with the model within the analyze allotment, falling back when it overruns or fails."""
+        if not self.agent.use_model:
+            return self.agent.fallback_analysis(context_type, data, "no_model")
+        predicted = self.agent.predicted_analysis(context_type, data)
+        if predicted:
+            return predicted
+        try:
+            return await asyncio.wait_for(self._infer(context_type, data), timeout=self.budget.stage('analyze'))
+        except asyncio.TimeoutError:
+            return self.agent.fallback_analysis(context_type, data, "timeout")
+        except Exception as e:
+            print(f"Error in model analysis: {e}")
+            return self.agent.fallback_analysis(context_type, data, fallback_reason(e))
+
+    async def _infer(self, context_type: ContextType, data: Any) -> Dict[str, Any]:
+        if self._pool:
+            return await asyncio.wrap_future(self._pool.submit(context_type, data))
+        # Shielded so a timed-out context does not cancel the shared model load
+        await asyncio.shield(self._model_ready)
+        return await self._loop.run_in_executor(self._inference, self.agent.analyze, context_type.value, data)
+
+    def _maybe_send_early(self, context_type: ContextType, analysis: Dict[str, Any]):
+        """Send the first urgent section on its own instead of waiting for the slower ones."""
+        if (self.early_section is None and self.early_send_priority and context_type not in self.sent_before
+                and analysis.get("priority", 3) <= self.early_send_priority):
+            self.early_section = context_type
+            text = self.report_generator.report_header() + self.report_generator.format_section(context_type, self.data[context_type])
+            self._early_delivery = asyncio.create_task(self._send(text, [context_type]))
+
+    async def _send(self, text: str, sections: List[ContextType], continued: bool = False) -> bool:
+        sent = await self._loop.run_in_executor(self._io, self.telegram_bot.send_morning_update, text, continued)
+        if sent:
+            self.sent_sections.update(sections)
+            # Recorded at once, so a retry after this run is stopped does not send them again
+            record_delivery(self.config, [context_type.value for context_type in sections])
+            if self.time_to_first_message is None:
+                self.time_to_first_message = time.perf_counter() - self._start
+                get_tracer().event("first_message", elapsed_ms=round(self.time_to_first_message * 1000, 3))
+        return sent
+
+    async def _finish(self) -> str:
+        """Render the report and deliver whatever was not sent early."""
+        # Write batched history before the summary and report read it back
+        self.context_manager.flush()
+        print("\nAGENT SUMMARY")
+        print("=" * 50)
+        print(self.agent.get_agent_summary())
+        print("=" * 50)
+        self.agent.report_metrics()
+
+        data_by_context = {context_type: self.data.get(context_type) for context_type in ContextType}
+        report = self.report_generator.generate_report(
+            data_by_context[ContextType.WEATHER],
+            data_by_context[ContextType.STOCKS],
+            data_by_context[ContextType.NEWS],
+            data_by_context[ContextType.SPORTS]
+        )
+
+        if self._early_delivery:
+            await self._early_delivery
+        # Sections sent early, or by an earlier attempt at this scheduled run, are not sent again
+        skipped = self.sent_before | self.sent_sections
+        if skipped:
+            remaining = [context_type for context_type in ContextType if context_type not in skipped]
+            with get_tracer().span("render", exclude=",".join(sorted(c.value for c in skipped))) as span:
+                rest = "\n\n".join(self.report_generator.render_sections(data_by_context, exclude=skipped))
+                span["bytes"] = len(rest.encode())
+            sent = await self._send(rest, remaining, continued=True) if rest else True
+        else:
+            sent = await self._send(report, list(ContextType))
+        if not sent:
+            print("Error sending morning update via Telegram")
+        self.delivered = sent
+        # Sent stories are skipped next run, so only record news this run got to the chat
+        if ContextType.NEWS in self.sent_sections:
+            record_sent_news(self.config, data_by_context[ContextType.NEWS])
+        print(report)
+        return report
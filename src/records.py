@@ -0,0 +1,134 @@
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, field
+from src.context_manager import ContextType
+from src.serialization import to_epoch, to_iso
+
+@dataclass(slots=True)
+class AnalysisRecord:
+    """One analysis of a context, as stored in the agent's interactions."""
+    context_type: ContextType
+    timestamp: int
+    priority: int
+    insights: List[str]
+    actions: List[str]
+    data_hash: Optional[str] = None
+    source: Optional[str] = None
+    # Analyzer-specific fields such as market alerts
+    extra: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_analysis(cls, context_type: ContextType, analysis: Dict[str, Any], timestamp: int,
+                      data_hash: Optional[str] = None) -> "AnalysisRecord":
+        extra = {k: v for k, v in analysis.items() if k not in ("priority", "insights", "actions", "source")}
+        return cls(
+            context_type=context_type,
+            timestamp=timestamp,
+            priority=analysis.get("priority", 3),
+            insights=list(analysis.get("insights", [])),
+            actions=list(analysis.get("actions", [])),
+            data_hash=data_hash,
+            source=analysis.get("source"),
+            extra=extra or None
+        )
+
+    def to_analysis(self) -> Dict[str, Any]:
+        """Return the analysis dict in the shape Agent.analyze produces."""
+        analysis = {"priority": self.priority, "insights": self.insights, "actions": self.actions}
+        if self.source:
+            analysis["source"] = self.source
+        if self.extra:
+            analysis.update(self.extra)
+        return analysis
+
+    def to_row(self) -> list:
+        return [self.context_type.code, self.timestamp, self.priority, self.insights, self.actions,
+                self.data_hash, self.source, self.extra]
+
+    @classmethod
+    def from_row(cls, row: list) -> "AnalysisRecord":
+        return cls(ContextType.from_code(row[0]), *row[1:])
+
+    def to_legacy(self) -> Dict[str, Any]:
+        interaction = {
+            "timestamp": to_iso(self.timestamp),
+            "context_type": self.context_type.value,
+            "analysis": self.to_analysis()
+        }
+        if self.data_hash:
+            interaction["data_hash"] = self.data_hash
+        return interaction
+
+    @classmethod
+    def from_legacy(cls, interaction: Dict[str, Any]) -> "AnalysisRecord":
+        return cls.from_analysis(
+            ContextType(interaction["context_type"]),
+            interaction.get("analysis", {}),
+            to_epoch(interaction["timestamp"]),
+            interaction.get("data_hash")
+        )
+
+@dataclass(slots=True)
+class PatternRecord:
+    """Importance and key insights learned from one analysis."""
+    timestamp: int
+    importance: int
+    key_insights: List[str] = field(default_factory=list)
+
+    def to_row(self) -> list:
+        return [self.timestamp, self.importance, self.key_insights]
+
+    @classmethod
+    def from_row(cls, row: list) -> "PatternRecord":
+        return cls(*row)
+
+    def to_legacy(self) -> Dict[str, Any]:
+        return {"timestamp": to_iso(self.timestamp), "importance": self.importance, "key_insights": self.key_insights}
+
+    @classmethod
+    def from_legacy(cls, pattern: Dict[str, Any]) -> "PatternRecord":
+        return cls(to_epoch(pattern["timestamp"]), pattern.get("importance", 3), pattern.get("key_insights", []))
+
+def empty_memory() -> Dict[str, Any]:
+    return {
+        "interactions": [],
+        "learned_patterns": {},
+        "performance_metrics": {},
+        # Per-context learning statistics as compact rows, see src/learning.py
+        "context_stats": {},
+        "adaptation_history": []
+    }
+
+def memory_to_payload(memory: Dict[str, Any], fmt: str) -> Dict[str, Any]:
+    """Encode agent memory as compact rows for msgpack, or the readable JSON layout."""
+    payload = dict(memory)
+    if fmt == 'msgpack':
+        payload["interactions"] = [record.to_row() for record in memory["interactions"]]
+        payload["learned_patterns"] = {
+            ContextType(context).code: [pattern.to_row() for pattern in patterns]
+            for context, patterns in memory["learned_patterns"].items()
+        }
+    else:
+        payload["interactions"] = [record.to_legacy() for record in memory["interactions"]]
+        payload["learned_patterns"] = {
+            context: [pattern.to_legacy() for pattern in patterns]
+            for context, patterns in memory["learned_patterns"].items()
+        }
+    return payload
+
+def memory_from_payload(payload: Dict[str, Any], fmt: str) -> Dict[str, Any]:
+    """Decode agent memory written by memory_to_payload or by older versions."""
+    memory = empty_memory()
+    memory.update(payload)
+    if fmt == 'msgpack':
+        memory["interactions"] = [AnalysisRecord.from_row(row) for row in payload.get("interactions", [])]
+        memory["learned_patterns"] = {
+            ContextType.from_code(code).value: [PatternRecord.from_row(row) for row in rows]
+            for code, rows in payload.get("learned_patterns", {}).items()
+        }
+    else:
+        memory["interactions"] = [AnalysisRecord.from_legacy(item) for item in payload.get("interactions", [])]
+        memory["learned_patterns"] = {
+            context: [PatternRecord.from_legacy(item) for item in patterns]
+            for context, patterns in payload.get("learned_patterns", {}).items()
+        }
+    return memory
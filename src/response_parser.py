@@ -0,0 +1,96 @@
+from typing import Dict, Any, List, Optional, Iterable
+from dataclasses import dataclass, field
+import re
+
+# The value after the colon, so "Priority (1-5): 4" reads 4 and not the 1 of the echoed label
+PRIORITY_PATTERN = re.compile(r"priority[^:\n]*:[\s*_]*(\d+)", re.IGNORECASE)
+# "- item", "* item", "• item", "1. item", "2) item"
+BULLET_PATTERN = re.compile(r"^(?:[-*•]|\d+[.)])\s*(.+)$")
+PLACEHOLDER_PATTERN = re.compile(r"^(?:first|second|third|another)\s+(?:insight|action)\b", re.IGNORECASE)
+MAX_ITEMS = 2
+MAX_ITEM_LENGTH = 200
+
+@dataclass(slots=True)
+class ParsedResponse:
+    """Fields extracted from one model response.
+
+    confident is False when a field is missing or out of range, or when items are
+    placeholders or copied from the prompt's example.
+    """
+    priority: Optional[int]
+    insights: List[str] = field(default_factory=list)
+    actions: List[str] = field(default_factory=list)
+    confident: bool = False
+
+    def to_analysis(self) -> Dict[str, Any]:
+        return {
+            "priority": self.priority if self.priority is not None else 3,
+            "insights": self.insights,
+            "actions": self.actions,
+            "confident": self.confident
+        }
+
+def _clean_header(line: str) -> str:
+    """Lower-case a line without markdown emphasis or heading marks."""
+    return line.strip("*#_ ").lower()
+
+def parse_response(text: str, examples: Iterable[str] = ()) -> ParsedResponse:
+    """Parse 'Priority / Insights / Actions' output in a single pass over its lines.
+
+    Parsing stops where the model starts a second response, and items found in
+    `examples` (the prompt's example answer) make the result not confident.
+    """
+    priority: Optional[int] = None
+    valid_priority = False
+    sections: Dict[str, List[str]] = {"insights": [], "actions": []}
+    seen = {"insights": False, "actions": False}
+    current: Optional[List[str]] = None
+
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        header = _clean_header(line)
+        if header.startswith("priority"):
+            if priority is not None:
+                # The model began another answer
+                break
+            match = PRIORITY_PATTERN.match(header)
+            if match:
+                priority = int(match.group(1))
+                valid_priority = 1 <= priority <= 5
+                if not valid_priority:
+                    priority = 3
+            current = None
+            continue
+        if header.startswith("insights") or header.startswith("actions"):
+            name = "insights" if header.startswith("insights") else "actions"
+            if seen[name]:
+                break
+            seen[name] = True
+            current = sections[name]
+            # Items may follow the header on the same line
+            _, _, rest = line.partition(":")
+            line = rest.strip()
+            if not line:
+                continue
+        if current is None:
+            continue
+        match = BULLET_PATTERN.match(line)
+        if not match and current:
+            # Free text after the list is commentary, not another item
+            current = None
+            continue
+        item = (match.group(1) if match else line).strip("*_ ")
+        if item and len(current) < MAX_ITEMS and item not in current:
+            current.append(item[:MAX_ITEM_LENGTH])
+
+    insights, actions = sections["insights"], sections["actions"]
+    copied = set(examples)
+    suspicious = any(item in copied or PLACEHOLDER_PATTERN.match(item) for item in insights + actions)
+    return ParsedResponse(
+        priority=priority,
+        insights=insights,
+        actions=actions,
+        confident=valid_priority and bool(insights) and bool(actions) and not suspicious
+    )
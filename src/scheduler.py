@@ -11,8 +11,12 @@ import yaml
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.agent import Agent
-from src.context_manager import ContextManager, ContextType
+from src.agent import load_latest_patterns
+from src.budget import Budget
+from src.command_poller import CommandPoller
+from src.coordination import RUN_ID_ENV, RunCoordinator, SCHEDULE_TIME, run_id_for, scheduled_slot
+from src.metrics import start_metrics_server
+from src.tracing import configure_tracing
 
 def load_config() -> Dict[str, Any]:
     """Load configuration from YAML file."""
@@ -37,41 +41,67 @@ def send_notification(title: str, message: str, duration: int = 10):
         print(f"\n{title}\n{message}\n")
 
 def run_morning_update():
-    """Run the morning update, notify the top update, and save the full update to a file."""
+    """Run the morning update for the current slot unless another scheduler replica does it."""
     try:
-        # Load configuration
         config = load_config()
+    except Exception as e:
+        print(f"Error loading config: {e}")
+        return
+    run_id = run_id_for(scheduled_slot(datetime.now(), SCHEDULE_TIME))
+    coordinator = RunCoordinator(config)
+    try:
+        coordinator.run_once(run_id, lambda: _run_and_notify(config, run_id))
+    except Exception as e:
+        print(f"Error coordinating {run_id}: {e}")
+    finally:
+        coordinator.close()
+
+def _run_and_notify(config: Dict[str, Any], run_id: str) -> bool:
+    """Run the morning update, notify the top update, and save the full update to a file."""
+    try:
+        tracer = configure_tracing(config, run_id)
         
-        # Initialize agent and context manager
-        context_manager = ContextManager(config)
-        agent = Agent(config, context_manager)
+        budget = Budget(config)
         
-        # Run the morning update script and capture its output
-        result = subprocess.run(
-            [sys.executable, os.path.join("src", "morning_update.py")],
-            capture_output=True,
-            text=True
-        )
-        full_update = result.stdout
+        # Run the morning update script and capture its output; the run keeps to its own
+        # budget, so the timeout only stops one that is stuck
+        started = time.perf_counter()
+        with tracer.span("scheduler.morning_update") as span:
+            try:
+                result = subprocess.run(
+                    [sys.executable, os.path.join("src", "morning_update.py")],
+                    capture_output=True,
+                    text=True,
+                    timeout=budget.run_seconds + budget.grace_seconds,
+                    env={**os.environ, RUN_ID_ENV: run_id}
+                )
+                span["returncode"] = result.returncode
+                full_update = result.stdout
+            except subprocess.TimeoutExpired as e:
+                span["error"] = f"killed after {e.timeout:g}s"
+                # Output captured before the kill is bytes even in text mode on POSIX, but
+                # str on Windows, where it is collected by communicate()
+                output = e.stdout or ""
+                full_update = output.decode("utf-8", errors="replace") if isinstance(output, bytes) else output
+                print(f"Morning update exceeded its budget and was stopped after {e.timeout:g}s")
+        duration = time.perf_counter() - started
+        tracer.flush()
         
         # Determine the top most important update
         # We'll use the agent's memory of the last decisions for each context
         top_context = None
         top_priority = -1
         top_decision = None
-        for context_type in ContextType:
-            patterns = agent.memory["learned_patterns"].get(context_type.value, [])
-            if patterns:
-                last_pattern = patterns[-1]
-                importance = last_pattern.get("importance", 0)
-                if importance > top_priority:
-                    top_priority = importance
-                    top_context = context_type
-                    top_decision = last_pattern
+        for context_type, last_pattern in load_latest_patterns(config).items():
+            importance = last_pattern.importance
+            if importance > top_priority:
+                top_priority = importance
+                top_context = context_type
+                top_decision = last_pattern
         
         # Format the notification message
         if top_context and top_decision:
-            top_insight = next((insight for insight in top_decision.get('key_insights', []) if insight.strip()), "Update ready")
+            top_insight = next((insight for insight in top_decision.key_insights if insight.strip()), "Update ready")
             notif_msg = f"{top_context.value.title()}: {top_insight}. Check your inbox to know more."
         else:
             notif_msg = "Your Morning Update is ready! Check your inbox to know more."
@@ -91,9 +121,17 @@ def run_morning_update():
         # Log the update
         log_path = os.path.join("logs", "scheduler.log")
         with open(log_path, "a", encoding="utf-8") as f:
-            f.write(f"\n[{datetime.now()}] Morning update completed successfully\n")
+            if "error" in span:
+                outcome = "was stopped at its time budget"
+            elif span.get("returncode") != 0:
+                outcome = f"failed with exit code {span.get('returncode')}"
+            else:
+                outcome = "completed successfully"
+            f.write(f"\n[{datetime.now()}] Morning update {outcome}\n")
+            f.write(f"Run duration: {duration:.1f}s\n")
             f.write(f"Top context: {top_context.value if top_context else 'N/A'}\n")
             f.write(f"Notification: {notif_msg}\n")
+        return "error" not in span and span.get("returncode") == 0
         
     except Exception as e:
         error_msg = f"Error running morning update: {str(e)}"
@@ -103,15 +141,32 @@ def run_morning_update():
         log_path = os.path.join("logs", "scheduler.log")
         with open(log_path, "a", encoding="utf-8") as f:
             f.write(f"\n[{datetime.now()}] {error_msg}\n")
+        return False
 
 def main():
     """Main function to run the scheduler."""
     print("Starting scheduler...")
+    try:
+        config = load_config()
+    except Exception as e:
+        print(f"Error loading config: {e}")
+        config = {}
+    # Started independently so one failing does not keep the other from running
+    try:
+        start_metrics_server(config)
+    except Exception as e:
+        print(f"Error starting metrics server: {e}")
+    try:
+        if (config.get('commands', {}) or {}).get('enabled', False):
+            CommandPoller(config).start()
+            print("Answering Telegram commands")
+    except Exception as e:
+        print(f"Error starting command poller: {e}")
     # For testing: Run the update immediately
     print("Running test update immediately...")
     run_morning_update()
     # Schedule the morning update for future runs
-    schedule.every().day.at("07:00").do(run_morning_update)
+    schedule.every().day.at(SCHEDULE_TIME).do(run_morning_update)
     print("Scheduled future updates for 7:00 AM daily")
     # Run the scheduler
     while True:
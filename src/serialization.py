@@ -0,0 +1,53 @@
+from typing import Dict, Any, Optional
+from datetime import datetime
+import json
+import os
+
+try:
+    import msgpack
+except ImportError:  # JSON is used when msgpack is not installed
+    msgpack = None
+
+def to_epoch(timestamp: Any) -> Optional[int]:
+    """Convert an ISO timestamp string (as in older logs) or a number to integer epoch seconds."""
+    if timestamp is None:
+        return None
+    if isinstance(timestamp, (int, float)):
+        return int(timestamp)
+    return int(datetime.fromisoformat(timestamp).timestamp())
+
+def to_iso(timestamp: Optional[int]) -> Optional[str]:
+    """Convert integer epoch seconds back to the ISO format used in JSON logs."""
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp).isoformat()
+
+def storage_format(config: Dict[str, Any]) -> str:
+    """Configured on-disk format, falling back to JSON when msgpack is not installed."""
+    fmt = (config.get('storage', {}) or {}).get('format', 'msgpack')
+    return 'msgpack' if fmt == 'msgpack' and msgpack is not None else 'json'
+
+def storage_backend(config: Dict[str, Any]) -> str:
+    """Configured storage backend: 'file' for the JSON/msgpack logs or 'sqlite'."""
+    return (config.get('storage', {}) or {}).get('backend', 'file')
+
+def write_payload(path: str, payload: Any, fmt: str) -> int:
+    """Write a payload in the given format and return the number of bytes written."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if fmt == 'msgpack':
+        encoded = msgpack.packb(payload, use_bin_type=True)
+    else:
+        encoded = json.dumps(payload, indent=2).encode()
+    # Write to a temporary file first so a crash never leaves a truncated log
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(encoded)
+    os.replace(tmp_path, path)
+    return len(encoded)
+
+def read_payload(path: str, fmt: str) -> Any:
+    """Read a payload written by write_payload."""
+    with open(path, 'rb') as f:
+        if fmt == 'msgpack':
+            return msgpack.unpackb(f.read(), raw=False, strict_map_key=False)
+        return json.load(f)
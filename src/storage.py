@@ -0,0 +1,199 @@
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from src.context_manager import Context, ContextType
+from src.records import AnalysisRecord, PatternRecord
+from src.tracing import get_tracer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contexts (
+    id INTEGER PRIMARY KEY,
+    context_type INTEGER NOT NULL,
+    timestamp INTEGER,
+    priority INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_contexts_type_time ON contexts (context_type, timestamp);
+
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    context_type INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    insights TEXT NOT NULL,
+    actions TEXT NOT NULL,
+    data_hash TEXT,
+    source TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_type_time ON analyses (context_type, timestamp);
+CREATE INDEX IF NOT EXISTS idx_analyses_type_hash ON analyses (context_type, data_hash);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+def sqlite_path(config: Dict[str, Any]) -> str:
+    return (config.get('storage', {}) or {}).get('sqlite_path', os.path.join("logs", "morning_update.db"))
+
+class SQLiteStore:
+    """SQLite store for context history and analyses, in WAL mode so readers never block the writer."""
+
+    def __init__(self, config: Dict[str, Any], read_only: bool = False):
+        settings = config.get('storage', {}) or {}
+        self.path = sqlite_path(config)
+        self.batch_size = int(settings.get('batch_size', 50))
+        self.read_only = read_only
+        self._pending_contexts: List[tuple] = []
+        self._pending_analyses: List[tuple] = []
+        # The connection is shared with the command poller thread, so every statement on it,
+        # and the queues flushed through it, are used under this lock
+        self._lock = threading.RLock()
+
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=30, check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+            # Pending rows must not be lost if the process exits without an explicit flush
+            atexit.register(self.flush)
+
+    def add_context(self, context: Context):
+        """Queue a context for the next batched write."""
+        with self._lock:
+            self._pending_contexts.append((
+                context.type.code, context.timestamp, context.priority, json.dumps(context.data, default=str)
+            ))
+            if len(self._pending_contexts) >= self.batch_size:
+                self.flush()
+
+    def add_analysis(self, record: AnalysisRecord):
+        """Queue an analysis for the next batched write."""
+        with self._lock:
+            self._pending_analyses.append((
+                record.context_type.code, record.timestamp, record.priority,
+                json.dumps(record.insights), json.dumps(record.actions),
+                record.data_hash, record.source, json.dumps(record.extra) if record.extra else None
+            ))
+            if len(self._pending_analyses) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """Write all queued rows in a single transaction."""
+        with self._lock:
+            if not self._pending_contexts and not self._pending_analyses:
+                return
+            contexts, self._pending_contexts = self._pending_contexts, []
+            analyses, self._pending_analyses = self._pending_analyses, []
+            with get_tracer().span("persist.sqlite", rows=len(contexts) + len(analyses)):
+                with self.conn:
+                    self.conn.executemany(
+                        "INSERT INTO contexts (context_type, timestamp, priority, data) VALUES (?, ?, ?, ?)",
+                        contexts
+                    )
+                    self.conn.executemany(
+                        "INSERT INTO analyses (context_type, timestamp, priority, insights, actions, data_hash, source, extra) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        analyses
+                    )
+
+    def set_meta(self, key: str, value: Any):
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _analysis_from_row(self, row: tuple) -> AnalysisRecord:
+        code, timestamp, priority, insights, actions, data_hash, source, extra = row
+        return AnalysisRecord(
+            ContextType.from_code(code), timestamp, priority, json.loads(insights), json.loads(actions),
+            data_hash, source, json.loads(extra) if extra else None
+        )
+
+    def latest_analysis(self, context_type: ContextType) -> Optional[AnalysisRecord]:
+        """Most recent analysis of a context, from the (context_type, timestamp) index."""
+        with self._lock:
+            self.flush()
+            row = self.conn.execute(
+                "SELECT context_type, timestamp, priority, insights, actions, data_hash, source, extra FROM analyses "
+                "WHERE context_type = ? ORDER BY timestamp DESC, id DESC LIMIT 1",
+                (context_type.code,)
+            ).fetchone()
+        return self._analysis_from_row(row) if row else None
+
+    def latest_patterns(self) -> Dict[ContextType, PatternRecord]:
+        """Latest learned importance and insights per context."""
+        patterns = {}
+        for context_type in ContextType:
+            record = self.latest_analysis(context_type)
+            if record:
+                patterns[context_type] = PatternRecord(record.timestamp, record.priority, record.insights)
+        return patterns
+
+    def find_analysis(self, context_type: ContextType, data_hash: str) -> Optional[AnalysisRecord]:
+        """Latest analysis of identical data for a context."""
+        with self._lock:
+            self.flush()
+            row = self.conn.execute(
+                "SELECT context_type, timestamp, priority, insights, actions, data_hash, source, extra FROM analyses "
+                "WHERE context_type = ? AND data_hash = ? ORDER BY id DESC LIMIT 1",
+                (context_type.code, data_hash)
+            ).fetchone()
+        return self._analysis_from_row(row) if row else None
+
+    def priority_trend(self, context_type: ContextType, since: int) -> List[Tuple[int, int]]:
+        """(timestamp, priority) pairs for a context since an epoch time, oldest first."""
+        with self._lock:
+            self.flush()
+            return self.conn.execute(
+                "SELECT timestamp, priority FROM analyses WHERE context_type = ? AND timestamp >= ? ORDER BY timestamp",
+                (context_type.code, since)
+            ).fetchall()
+
+    def iter_analyses(self) -> Iterator[Tuple[str, int, List[str], Optional[str], Optional[bool]]]:
+        """(context, priority, insights, source, confident) of every analysis, oldest first."""
+        # Fetched before yielding, so the lock is not held while the caller iterates
+        with self._lock:
+            self.flush()
+            rows = self.conn.execute(
+                "SELECT context_type, priority, insights, source, extra FROM analyses ORDER BY timestamp, id"
+            ).fetchall()
+        for code, priority, insights, source, extra in rows:
+            confident = json.loads(extra).get("confident") if extra else None
+            yield ContextType.from_code(code).value, priority, json.loads(insights), source, confident
+
+    def latest_context(self, context_type: ContextType) -> Optional[Context]:
+        """Most recent stored data for a context."""
+        with self._lock:
+            self.flush()
+            row = self.conn.execute(
+                "SELECT timestamp, priority, data FROM contexts WHERE context_type = ? "
+                "ORDER BY timestamp DESC, id DESC LIMIT 1",
+                (context_type.code,)
+            ).fetchone()
+        if not row:
+            return None
+        return Context(context_type, json.loads(row[2]), row[1], row[0])
+
+    def count(self, table: str) -> int:
+        with self._lock:
+            self.flush()
+            return self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if not self.read_only:
+                self.flush()
+                atexit.unregister(self.flush)
+            self.conn.close()
@@ -1,36 +1,58 @@
 import os
 import requests
-from typing import Optional
+from typing import Dict, Any, List, Optional
+from src.tracing import get_tracer
 
 class TelegramBot:
-    def __init__(self, token: str, chat_id: str):
+    def __init__(self, token: str, chat_id: str, api_url: str = "https://api.telegram.org", timeout: Optional[float] = None):
         self.token = token
         self.chat_id = chat_id
-        self.base_url = f"https://api.telegram.org/bot{token}"
+        self.timeout = timeout
+        self.base_url = f"{api_url.rstrip('/')}/bot{token}"
 
     def send_message(self, text: str, parse_mode: Optional[str] = None) -> bool:
         """Send a message to the specified chat."""
-        try:
-            url = f"{self.base_url}/sendMessage"
-            data = {
-                "chat_id": self.chat_id,
-                "text": text,
-                "parse_mode": parse_mode
-            }
-            response = requests.post(url, json=data)
-            
-            if response.status_code != 200:
-                print(f"Error sending message. Status code: {response.status_code}")
-                print(f"Response: {response.text}")
-                return False
+        with get_tracer().span("telegram.send", bytes=len(text.encode())) as span:
+            try:
+                url = f"{self.base_url}/sendMessage"
+                data = {
+                    "chat_id": self.chat_id,
+                    "text": text,
+                    "parse_mode": parse_mode
+                }
+                response = requests.post(url, json=data, timeout=self.timeout)
+                span["status_code"] = response.status_code
                 
-            return True
-        except Exception as e:
-            print(f"Exception while sending Telegram message: {str(e)}")
-            return False
+                if response.status_code != 200:
+                    span["error"] = f"HTTP {response.status_code}"
+                    print(f"Error sending message. Status code: {response.status_code}")
+                    print(f"Response: {response.text}")
+                    return False
+                    
+                return True
+            except Exception as e:
+                print(f"Exception while sending Telegram message: {str(e)}")
+                span["error"] = str(e)
+                return False
+
+    def get_updates(self, offset: Optional[int] = None, poll_timeout: int = 30) -> List[Dict[str, Any]]:
+        """Long-poll for new updates starting at offset; waits up to poll_timeout seconds when there are none."""
+        with get_tracer().span("telegram.poll") as span:
+            params = {"timeout": poll_timeout, "allowed_updates": '["message"]'}
+            if offset is not None:
+                params["offset"] = offset
+            # The HTTP timeout must outlast the long poll itself
+            response = requests.get(f"{self.base_url}/getUpdates", params=params, timeout=poll_timeout + 10)
+            span["status_code"] = response.status_code
+            if response.status_code != 200:
+                span["error"] = f"HTTP {response.status_code}"
+                raise RuntimeError(f"getUpdates failed with status code {response.status_code}: {response.text[:200]}")
+            updates = response.json().get("result", [])
+            span["updates"] = len(updates)
+            return updates
 
-    def send_morning_update(self, update_text: str) -> bool:
-        """Send the morning update with proper formatting."""
+    def send_morning_update(self, update_text: str, continued: bool = False) -> bool:
+        """Send the morning update with proper formatting; continued text follows an earlier message."""
         try:
             # Split the update into chunks if it's too long (Telegram has a 4096 character limit)
             max_length = 4000  # Leave some room for formatting
@@ -39,7 +61,7 @@ class TelegramBot:
             success = True
             for i, chunk in enumerate(chunks):
                 # Add header for first chunk, continuation for others
-                if i == 0:
+                if i == 0 and not continued:
                     formatted_text = f"🌅 <b>Morning Update</b>\n\n{chunk}"
                 else:
                     formatted_text = f"<b>Continued...</b>\n\n{chunk}"
@@ -0,0 +1,179 @@
+from typing import Dict, Any, List, Optional, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+import cProfile
+import json
+import os
+import threading
+import time
+import uuid
+
+class Tracer:
+    """Collects timed spans for one run and writes them out as JSON lines."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, run_id: Optional[str] = None):
+        self.configure(config or {})
+        # Scheduled runs share the run ID the scheduler passes down
+        self.run_id = (run_id or os.getenv("MORNING_UPDATE_RUN_ID")
+                       or f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}")
+        self.spans: List[Dict[str, Any]] = []
+        self._flushed = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def configure(self, config: Dict[str, Any]):
+        """Apply tracing settings, e.g. once the config file has been loaded."""
+        settings = config.get('tracing', {}) or {}
+        self.enabled = settings.get('enabled', True)
+        self.trace_file = settings.get('trace_file', os.path.join("logs", "trace.jsonl"))
+        self.profile_enabled = settings.get('profile', False) or bool(os.getenv('MORNING_UPDATE_PROFILE'))
+        self.profile_dir = settings.get('profile_dir', "logs")
+
+    @property
+    def _stack(self) -> List[str]:
+        """Names of the open spans on the calling thread."""
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Dict[str, Any]]:
+        """Time a block of work. Attributes may be added to the yielded dict inside the block."""
+        record = {
+            "run_id": self.run_id,
+            "pid": os.getpid(),
+            "name": name,
+            "parent": self._stack[-1] if self._stack else None,
+            "start": datetime.now().isoformat(),
+            "attrs": dict(attrs)
+        }
+        self._stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield record["attrs"]
+            record["status"] = "ok"
+        except BaseException as e:
+            record["status"] = "error"
+            record["error"] = str(e)
+            raise
+        finally:
+            record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            self._stack.pop()
+            self._emit(record)
+
+    def event(self, name: str, **attrs):
+        """Record a point-in-time event such as a run summary."""
+        self._emit({
+            "run_id": self.run_id,
+            "pid": os.getpid(),
+            "name": name,
+            "parent": self._stack[-1] if self._stack else None,
+            "start": datetime.now().isoformat(),
+            "status": "ok",
+            "duration_ms": 0.0,
+            "attrs": attrs
+        })
+
+    def _emit(self, record: Dict[str, Any]):
+        with self._lock:
+            self.spans.append(record)
+
+    def take(self) -> List[Dict[str, Any]]:
+        """Remove and return the spans not yet flushed, to be added to another process's tracer."""
+        with self._lock:
+            taken = self.spans[self._flushed:]
+            del self.spans[self._flushed:]
+        return taken
+
+    def add(self, records: List[Dict[str, Any]]):
+        """Add spans recorded by another process, such as an analysis worker, to this run."""
+        with self._lock:
+            self.spans.extend(dict(record, run_id=self.run_id) for record in records)
+
+    def flush(self):
+        """Append spans recorded since the last flush to the trace file as JSON lines."""
+        with self._lock:
+            pending = self.spans[self._flushed:]
+            self._flushed = len(self.spans)
+        if not self.enabled or not pending:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.trace_file), exist_ok=True)
+            with open(self.trace_file, 'a', encoding="utf-8") as f:
+                f.write("".join(json.dumps(record, default=str) + "\n" for record in pending))
+        except Exception as e:
+            print(f"Error writing trace: {e}")
+
+    @contextmanager
+    def profile(self) -> Iterator[Optional[cProfile.Profile]]:
+        """Run a block under cProfile when profiling is enabled.
+
+        Stats are written to <profile_dir>/profile_<run_id>.prof for pstats or snakeviz.
+        For sampling with py-spy, attach to the pid recorded on every span instead.
+        """
+        if not self.profile_enabled:
+            yield None
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield profiler
+        finally:
+            profiler.disable()
+            try:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                path = os.path.join(self.profile_dir, f"profile_{self.run_id}.prof")
+                profiler.dump_stats(path)
+                print(f"Profile written to {path}")
+            except Exception as e:
+                print(f"Error writing profile: {e}")
+
+    def get_summary(self) -> str:
+        """Per-stage table of call counts, latency and accumulated counters for this run."""
+        stages: Dict[str, Dict[str, Any]] = {}
+        for span in self.spans:
+            stage = stages.setdefault(span["name"], {"count": 0, "total": 0.0, "max": 0.0, "errors": 0, "tokens": 0, "bytes": 0})
+            stage["count"] += 1
+            stage["total"] += span["duration_ms"]
+            stage["max"] = max(stage["max"], span["duration_ms"])
+            # Fetchers and senders handle their own failures and flag them in the attributes
+            stage["errors"] += span["status"] == "error" or "error" in span["attrs"]
+            stage["tokens"] += span["attrs"].get("input_tokens", 0) + span["attrs"].get("output_tokens", 0)
+            stage["bytes"] += span["attrs"].get("bytes", 0)
+
+        lines = [
+            f"Run {self.run_id}",
+            f"{'Stage':<28}{'Count':>6}{'Total ms':>11}{'Mean ms':>10}{'Max ms':>10}{'Errors':>7}{'Tokens':>8}{'Bytes':>10}",
+            "-" * 90
+        ]
+        for name, stage in stages.items():
+            lines.append(
+                f"{name:<28}{stage['count']:>6}{stage['total']:>11.1f}{stage['total'] / stage['count']:>10.1f}"
+                f"{stage['max']:>10.1f}{stage['errors']:>7}{stage['tokens']:>8}{stage['bytes']:>10}"
+            )
+        return "\n".join(lines)
+
+# Spans are kept in memory but not written out until a run configures tracing
+_tracer = Tracer({'tracing': {'enabled': False}})
+# Tracers bound to a thread, such as the command poller's, in place of the current run's
+_thread = threading.local()
+
+def get_tracer() -> Tracer:
+    """Return the tracer bound to the calling thread, else the tracer for the current run."""
+    return getattr(_thread, "tracer", None) or _tracer
+
+@contextmanager
+def bind_tracer(tracer: Tracer) -> Iterator[Tracer]:
+    """Record the calling thread's spans with `tracer` inside the block, apart from the current run."""
+    previous = getattr(_thread, "tracer", None)
+    _thread.tracer = tracer
+    try:
+        yield tracer
+    finally:
+        _thread.tracer = previous
+
+def configure_tracing(config: Optional[Dict[str, Any]] = None, run_id: Optional[str] = None) -> Tracer:
+    """Start a new run, optionally with tracing settings from the config."""
+    global _tracer
+    _tracer = Tracer(config, run_id)
+    return _tracer
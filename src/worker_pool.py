@@ -0,0 +1,120 @@
+from typing import Dict, Any, List, Optional, Tuple
+import multiprocessing
+import os
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor
+from src.agent import Agent
+from src.context_manager import ContextType
+from src.tracing import get_tracer
+
+# The agent of the current worker process, created once by _init_worker
+_worker_agent: Optional[Agent] = None
+
+def _init_worker(config: Dict[str, Any], agent_class: type, torch_threads: int):
+    """Load the model once per worker process."""
+    global _worker_agent
+    if torch_threads:
+        try:
+            import torch
+            # Keep workers from oversubscribing the cores with their own thread pools
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+    _worker_agent = agent_class(config)
+    try:
+        _worker_agent._ensure_model()
+    except Exception as e:
+        # Reported again by each job so the parent can fall back
+        print(f"Error loading model in worker {os.getpid()}: {e}")
+
+def analyze_job(context_type: str, data: Any) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Run one analysis in a worker process.
+
+    Returns the analysis with the spans recorded since the previous job (the first job
+    also carries the model load), since the worker's own tracer is never written out.
+    A failed job's spans travel on the exception.
+    """
+    try:
+        analysis = _worker_agent.analyze(context_type, data)
+    except Exception as e:
+        e.spans = get_tracer().take()
+        raise
+    return analysis, get_tracer().take()
+
+class AnalysisPool:
+    """Pool of analysis worker processes, each holding its own copy of the model.
+
+    Jobs are (ContextType, data) pairs; results come back to the parent, which keeps
+    memory and history. Workers never read or write the agent's memory.
+    """
+
+    def __init__(self, config: Dict[str, Any], agent_class: type = Agent, processes: Optional[int] = None):
+        settings = config.get('workers', {}) or {}
+        self.processes = processes or int(settings.get('processes', 0)) or 1
+        torch_threads = int(settings.get('torch_threads', 0)) or max(1, (os.cpu_count() or 1) // self.processes)
+        # spawn avoids forking a parent that may already hold torch threads
+        context = multiprocessing.get_context(settings.get('start_method', 'spawn'))
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(config, agent_class, torch_threads)
+        )
+
+    def submit(self, context_type: ContextType, data: Any) -> Future:
+        """Queue an analysis. The future resolves to the analysis, and the worker's spans join this run's trace."""
+        tracer = get_tracer()
+        job = self.executor.submit(analyze_job, context_type.value, data)
+        result: Future = Future()
+
+        def finish(job: Future):
+            try:
+                if job.cancelled():
+                    result.cancel()
+                    return
+                error = job.exception()
+                if error is None:
+                    analysis, spans = job.result()
+                    tracer.add(spans)
+                    result.set_result(analysis)
+                else:
+                    tracer.add(getattr(error, "spans", []))
+                    result.set_exception(error)
+            except InvalidStateError:
+                # The caller cancelled the result first
+                pass
+
+        job.add_done_callback(finish)
+        result.add_done_callback(lambda result: result.cancelled() and job.cancel())
+        return result
+
+    def analyze_batch(self, jobs: List[Tuple[ContextType, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Analyze jobs in parallel; a failed job's result is None."""
+        futures = [self.submit(context_type, data) for context_type, data in jobs]
+        results = []
+        for (context_type, _), future in zip(jobs, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"Error analyzing {context_type.value} in worker: {e}")
+                results.append(None)
+        return results
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers, cancelling queued jobs.
+
+        Without wait, workers still analyzing are terminated: generation cannot be
+        interrupted, and the interpreter would otherwise wait for it at exit.
+        """
+        # The executor has no public way to reach its processes before Python 3.14
+        processes = list((self.executor._processes or {}).values())
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+        if not wait:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+    def __enter__(self) -> "AnalysisPool":
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
@@ -0,0 +1,181 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+# Add the repository root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.agent import Agent
+from src.command_poller import CommandPoller, HELP_TEXT
+from src.context_manager import ContextManager, ContextType
+from src.morning_update import get_sample_data
+from src.tracing import configure_tracing
+
+TOKEN = "123:test"
+CHAT_ID = "42"
+
+class FakeBotAPI:
+    """A local Bot API serving queued updates to getUpdates and recording sendMessage calls."""
+
+    def __init__(self):
+        self.updates: List[Dict[str, Any]] = []
+        self.sent: List[Dict[str, Any]] = []
+        self.offsets: List[Any] = []
+        self.next_id = 100
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                assert url.path == f"/bot{TOKEN}/getUpdates"
+                params = parse_qs(url.query)
+                offset = int(params["offset"][0]) if "offset" in params else None
+                api.offsets.append(offset)
+                # getUpdates confirms every update below the offset
+                api.updates = [u for u in api.updates if offset is None or u["update_id"] >= offset]
+                self._reply({"ok": True, "result": api.updates})
+
+            def do_POST(self):
+                assert self.path == f"/bot{TOKEN}/sendMessage"
+                api.sent.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+                self._reply({"ok": True, "result": {}})
+
+            def _reply(self, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def message(self, text: str, chat_id: str = CHAT_ID):
+        self.updates.append({"update_id": self.next_id, "message": {"text": text, "chat": {"id": int(chat_id)}}})
+        self.next_id += 1
+
+class NoInferenceAgent(Agent):
+    def analyze(self, context_type, data):
+        raise AssertionError("commands must not run the model")
+
+@pytest.fixture
+def api():
+    fake = FakeBotAPI()
+    yield fake
+    fake.server.shutdown()
+
+@pytest.fixture
+def config(tmp_path, monkeypatch, api):
+    # History and offsets live under logs/ relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    config = {
+        "api_keys": {"openai": "", "news": ""},
+        "city": "Boston",
+        "telegram": {"bot_token": TOKEN, "chat_id": CHAT_ID},
+        "endpoints": {"telegram": api.url},
+        "commands": {"poll_timeout": 0},
+        "model": {"enabled": False}
+    }
+    context_manager = ContextManager(config)
+    agent = Agent(config, context_manager)
+    for context_type, data in zip(ContextType, get_sample_data()):
+        context_manager.set_context(context_type, data)
+        agent.record_analysis(context_type, {"priority": 2, "insights": [f"{context_type.value} insight"],
+                                             "actions": [f"{context_type.value} action"]}, data)
+    context_manager.flush()
+    return config
+
+def test_section_reply_uses_stored_analysis(api, config):
+    api.message("/stocks")
+    poller = CommandPoller(config, agent_class=NoInferenceAgent)
+    start = time.perf_counter()
+    assert poller.poll_once() == 1
+    assert time.perf_counter() - start < 1.0
+    assert len(api.sent) == 1
+    reply = api.sent[0]
+    assert reply["chat_id"] == CHAT_ID
+    assert "AAPL" in reply["text"] and "stocks insight" in reply["text"] and "Priority: 2" in reply["text"]
+
+def test_update_command_sends_full_report(api, config):
+    api.message("/update@MorningBot")
+    CommandPoller(config, agent_class=NoInferenceAgent).poll_once()
+    text = "".join(message["text"] for message in api.sent)
+    assert "Morning World Update" in text
+    assert all(marker in text for marker in ("AAPL", "NEWS", "WEATHER"))
+
+def test_reply_is_reused_until_the_data_changes(api, config):
+    poller = CommandPoller(config, agent_class=NoInferenceAgent)
+    first, cached = poller.reply_for("weather")
+    assert not cached
+    assert poller.reply_for("weather") == (first, True)
+
+    # A later run stores different weather
+    time.sleep(0.01)
+    context_manager = ContextManager(config)
+    agent = Agent(config, context_manager)
+    weather = dict(get_sample_data()[0], temperature=-5, condition="snow")
+    context_manager.set_context(ContextType.WEATHER, weather)
+    agent.record_analysis(ContextType.WEATHER, {"priority": 1, "insights": ["Snow"], "actions": ["Leave early"]}, weather)
+    reply, cached = poller.reply_for("weather")
+    assert not cached and reply != first and "Leave early" in reply
+
+def test_offset_is_persisted_across_restarts(api, config):
+    api.message("/news")
+    api.message("/sports")
+    CommandPoller(config, agent_class=NoInferenceAgent).poll_once()
+    assert len(api.sent) == 2
+
+    restarted = CommandPoller(config, agent_class=NoInferenceAgent)
+    assert restarted.offset == api.next_id
+    restarted.poll_once()
+    assert api.offsets[-1] == api.next_id
+    assert len(api.sent) == 2
+
+def test_other_chats_and_plain_text_are_ignored(api, config):
+    api.message("/update", chat_id="7")
+    api.message("good morning")
+    poller = CommandPoller(config, agent_class=NoInferenceAgent)
+    assert poller.poll_once() == 2
+    assert api.sent == []
+    assert poller.offset == api.next_id
+
+def test_unknown_command_gets_help(api, config):
+    api.message("/start")
+    CommandPoller(config, agent_class=NoInferenceAgent).poll_once()
+    assert api.sent[0]["text"] == HELP_TEXT
+
+def test_history_without_analysis_uses_rules_without_fallback_event(api, config):
+    # Data stored without an analysis, e.g. by a run that stopped before analyzing it
+    sports = {"nba": [{"summary": "GSW vs LAL: Warriors won 120-115"}]}
+    ContextManager(config).set_context(ContextType.SPORTS, sports)
+    tracer = configure_tracing({"tracing": {"enabled": False}})
+    reply, _ = CommandPoller(config, agent_class=NoInferenceAgent).reply_for("sports")
+    assert "Warriors won" in reply and "Priority:" in reply
+    assert not any(span["name"] == "fallback" for span in tracer.spans)
+
+def test_polls_are_traced_apart_from_the_run(api, config):
+    run_tracer = configure_tracing({"tracing": {"enabled": False}})
+    poller = CommandPoller(config, agent_class=NoInferenceAgent)
+    assert poller.poll_once() == 0
+    api.message("/weather")
+    assert poller.poll_once() == 1
+    assert not any(span["name"].startswith("telegram.") for span in run_tracer.spans)
+
+    # Only the poll that received a command is written, under the poller's own run id
+    with open(os.path.join("logs", "trace.jsonl"), encoding="utf-8") as f:
+        spans = [json.loads(line) for line in f]
+    assert {span["run_id"] for span in spans} == {poller.tracer.run_id}
+    names = [span["name"] for span in spans]
+    assert names.count("telegram.poll") == 1 and "telegram.command" in names
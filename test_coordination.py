@@ -0,0 +1,209 @@
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import pytest
+
+# Add the repository root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.agent import Agent
+from src.coordination import RUN_ID_ENV, RunCoordinator, delivered_sections, run_id_for, scheduled_slot
+from src import morning_update
+from src.morning_update import get_fetchers, run_update
+from src.pipeline import AsyncPipeline
+from src.tracing import configure_tracing
+
+RUN_ID = "morning-update-20250430T0700"
+
+def make_config(tmp_path, **settings) -> dict:
+    coordination = {"enabled": True, "db_path": str(tmp_path / "coordination.db"),
+                    "lease_seconds": 1, "poll_seconds": 0.05, "standby_seconds": 10}
+    coordination.update(settings)
+    return {"coordination": coordination}
+
+def replica(config: dict, name: str, log_path: str, start: float, crash: bool = False):
+    """One scheduler replica; the job appends the replica's name to a shared log."""
+    coordinator = RunCoordinator(config, replica_id=name)
+    time.sleep(max(0.0, start - time.time()))
+
+    def job() -> bool:
+        with open(log_path, "a") as f:
+            f.write(name + "\n")
+        if crash:
+            # Die mid-run without releasing the lease
+            os._exit(1)
+        time.sleep(0.3)
+        return True
+
+    coordinator.run_once(RUN_ID, job)
+
+def run_replicas(config: dict, log_path: str, count: int = 4):
+    ctx = multiprocessing.get_context("spawn")
+    start = time.time() + 1.5
+    processes = [
+        ctx.Process(target=replica, args=(config, f"replica-{i}", log_path, start))
+        for i in range(count)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+    with open(log_path) as f:
+        return f.read().split()
+
+def test_one_replica_runs_each_slot(tmp_path):
+    config = make_config(tmp_path)
+    ran = run_replicas(config, str(tmp_path / "jobs.log"))
+    assert len(ran) == 1
+    status = RunCoordinator(config).status(RUN_ID)
+    assert status["status"] == "done" and status["holder"] == ran[0] and status["attempt"] == 1
+
+def test_standby_takes_over_after_crash(tmp_path):
+    config = make_config(tmp_path)
+    coordinator = RunCoordinator(config, replica_id="crashed")
+    # The first holder claimed the run and died, so its lease is never renewed
+    assert coordinator.try_acquire(RUN_ID) is None
+    coordinator.close()
+    ran = run_replicas(config, str(tmp_path / "jobs.log"), count=3)
+    assert len(ran) == 1
+    status = RunCoordinator(config).status(RUN_ID)
+    assert status["status"] == "done" and status["attempt"] == 2
+
+def test_crash_during_run_is_retried_once(tmp_path):
+    config = make_config(tmp_path, max_attempts=2)
+    log_path = str(tmp_path / "jobs.log")
+    ctx = multiprocessing.get_context("spawn")
+    crashed = ctx.Process(target=replica, args=(config, "crashed", log_path, time.time(), True))
+    crashed.start()
+    crashed.join(30)
+    ran = run_replicas(config, log_path, count=2)
+    assert ran[0] == "crashed" and len(ran) == 2
+    assert RunCoordinator(config).status(RUN_ID)["status"] == "done"
+
+def test_finished_run_is_not_repeated(tmp_path):
+    config = make_config(tmp_path)
+    calls = []
+    assert RunCoordinator(config, replica_id="a").run_once(RUN_ID, lambda: calls.append("a") or True)
+    assert not RunCoordinator(config, replica_id="b").run_once(RUN_ID, lambda: calls.append("b") or True)
+    assert calls == ["a"]
+
+def test_failed_run_stops_after_max_attempts(tmp_path):
+    config = make_config(tmp_path, max_attempts=2)
+    calls = []
+    for name in ("a", "b", "c"):
+        RunCoordinator(config, replica_id=name).run_once(RUN_ID, lambda name=name: calls.append(name) and False)
+    assert calls == ["a", "b"]
+    assert RunCoordinator(config).status(RUN_ID)["status"] == "failed"
+
+def test_disabled_coordination_always_runs(tmp_path):
+    config = {"coordination": {"enabled": False, "db_path": str(tmp_path / "coordination.db")}}
+    calls = []
+    for _ in range(2):
+        assert RunCoordinator(config).run_once(RUN_ID, lambda: calls.append(1) or True)
+    assert len(calls) == 2
+    assert not os.path.exists(tmp_path / "coordination.db")
+
+@pytest.mark.parametrize("now,expected", [
+    (datetime(2025, 4, 30, 7, 0, 30), "morning-update-20250430T0700"),
+    (datetime(2025, 4, 30, 6, 59), "morning-update-20250429T0700"),
+    (datetime(2025, 4, 30, 12, 0), "morning-update-20250430T0700"),
+])
+def test_run_id_is_the_same_for_a_slot(now, expected):
+    assert run_id_for(scheduled_slot(now)) == expected
+
+class RecordingBot:
+    def __init__(self):
+        self.messages = []
+
+    def send_morning_update(self, text: str, continued: bool = False) -> bool:
+        self.messages.append((text, continued))
+        return True
+
+def run_pipeline(config: dict) -> list:
+    pipeline = AsyncPipeline(config, get_fetchers(config))
+    pipeline.telegram_bot = RecordingBot()
+    asyncio.run(pipeline.run())
+    assert pipeline.delivered
+    return pipeline.telegram_bot.messages
+
+def test_retry_skips_sections_already_sent(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv(RUN_ID_ENV, RUN_ID)
+    config = make_config(tmp_path)
+    config.update({"api_keys": {"openai": "", "news": ""}, "city": "Boston",
+                   "telegram": {"bot_token": "123:test", "chat_id": "42"}, "model": {"enabled": False}})
+    # The first attempt sent the weather section early and was then stopped
+    RunCoordinator(config).record_delivery(RUN_ID, ["weather"])
+
+    text = "".join(message for message, _ in run_pipeline(config))
+    assert "WEATHER" not in text
+    assert all(section in text for section in ("STOCKS", "NEWS", "SPORTS"))
+    assert delivered_sections(config) == {"weather", "stocks", "news", "sports"}
+    # Another retry has nothing left to send
+    assert run_pipeline(config) == []
+
+def test_serial_retry_skips_sections_already_sent(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv(RUN_ID_ENV, RUN_ID)
+    bot = RecordingBot()
+    monkeypatch.setattr(morning_update, "TelegramBot", lambda **kwargs: bot)
+    config = make_config(tmp_path)
+    config.update({"api_keys": {"openai": "", "news": ""}, "city": "Boston", "pipeline": {"async": False},
+                   "telegram": {"bot_token": "123:test", "chat_id": "42"}, "model": {"enabled": False}})
+    RunCoordinator(config).record_delivery(RUN_ID, ["weather", "news"])
+
+    assert run_update(config)
+    [(text, continued)] = bot.messages
+    assert continued and "WEATHER" not in text and "NEWS" not in text and "STOCKS" in text
+    assert delivered_sections(config) == {"weather", "stocks", "news", "sports"}
+
+class SlowAgent(Agent):
+    """Spends the whole run on its first analysis."""
+
+    def _load_model(self):
+        self.tokenizer = None
+        self.model = object()
+
+    def analyze(self, context_type, data):
+        self.analyzed.append(context_type)
+        time.sleep(0.3)
+        return {"priority": 2, "insights": ["Slow"], "actions": [], "source": "model", "confident": True}
+
+def test_serial_run_falls_back_once_the_budget_is_spent(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv(RUN_ID_ENV, raising=False)
+    bot = RecordingBot()
+    monkeypatch.setattr(morning_update, "TelegramBot", lambda **kwargs: bot)
+    monkeypatch.setattr(SlowAgent, "analyzed", [], raising=False)
+    tracer = configure_tracing({"tracing": {"enabled": False}})
+    config = {"api_keys": {"openai": "", "news": ""}, "city": "Boston", "pipeline": {"async": False},
+              "telegram": {"bot_token": "123:test", "chat_id": "42"},
+              "budget": {"run_seconds": 0.4, "stages": {"deliver": 0.1}}}
+
+    assert run_update(config, agent_class=SlowAgent)
+    assert SlowAgent.analyzed == ["weather"]
+    [deadline] = [span for span in tracer.spans if span["name"] == "pipeline.deadline"]
+    assert deadline["attrs"]["pending"] == ["news", "sports"]
+    fallbacks = [span["attrs"] for span in tracer.spans if span["name"] == "fallback"]
+    assert [(f["context"], f["reason"]) for f in fallbacks] == [("news", "deadline"), ("sports", "deadline")]
+    assert len(bot.messages) == 1
+
+def test_deliveries_are_only_tracked_for_scheduled_coordinated_runs(tmp_path, monkeypatch):
+    monkeypatch.delenv(RUN_ID_ENV, raising=False)
+    config = make_config(tmp_path)
+    RunCoordinator(config).record_delivery(RUN_ID, ["news"])
+    assert delivered_sections(config) == set()
+    monkeypatch.setenv(RUN_ID_ENV, RUN_ID)
+    assert delivered_sections(config) == {"news"}
+    assert delivered_sections(make_config(tmp_path, enabled=False)) == set()
+
+def test_failed_run_exits_non_zero(tmp_path):
+    # No config/config.yaml in the working directory
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "morning_update.py")
+    result = subprocess.run([sys.executable, script], cwd=tmp_path, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 1
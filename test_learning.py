@@ -0,0 +1,149 @@
+import os
+import random
+import statistics
+import sys
+
+import pytest
+
+# Add the repository root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.agent import Agent
+from src.context_manager import ContextManager, ContextType
+from src.learning import MAX_SCALE, ContextStats, rebuild_stats, stats_from_payload, stats_to_payload
+from src.morning_update import get_sample_data
+
+WEATHER = get_sample_data()[0]
+CLEAR = {"priority": 1, "insights": ["Clear skies"], "actions": ["No umbrella needed"], "source": "model", "confident": True}
+
+def test_mean_and_variance_match_statistics():
+    rng = random.Random(7)
+    priorities = [rng.randint(1, 5) for _ in range(200)]
+    stats = ContextStats()
+    for priority in priorities:
+        stats.update(priority, [])
+    assert stats.mean == pytest.approx(statistics.mean(priorities))
+    assert stats.variance == pytest.approx(statistics.variance(priorities))
+    assert stats.std == pytest.approx(statistics.stdev(priorities))
+
+def test_term_weights_decay_across_renormalization():
+    decay, updates = 0.7, 60
+    stats = ContextStats()
+    stats.update(3, ["Rain expected"], decay)
+    renormalized = False
+    for _ in range(updates):
+        scale = stats.scale
+        stats.update(3, ["Sunny skies"], decay)
+        renormalized |= stats.scale < scale
+    assert renormalized and stats.scale < MAX_SCALE
+
+    weights = dict(stats.top_terms(10))
+    # Each weight sums decay**age over the analyses that mentioned the term
+    assert weights["sunny"] == pytest.approx(sum(decay ** age for age in range(updates)))
+    assert weights["rain"] == pytest.approx(decay ** updates)
+    assert {term for term, _ in stats.top_terms(2)} == {"sunny", "skies"}
+
+def test_hit_rate_rises_with_repeated_insights():
+    repeated, varied = ContextStats(), ContextStats()
+    for day in range(10):
+        repeated.update(2, [f"AAPL up {day}%"])
+        varied.update(2, [f"Insight number {'x' * day}"])
+    assert repeated.hit_rate > 0.8
+    assert varied.hit_rate == 0.0
+
+def test_row_round_trip():
+    stats = ContextStats()
+    for day in range(12):
+        stats.update(day % 3 + 1, [f"Term{day % 4} rises", "Markets steady"])
+    stats.predictions = 2
+    restored = stats_from_payload(stats_to_payload({"stocks": stats}))["stocks"]
+    assert (restored.count, restored.predictions, list(restored.recent)) == (stats.count, 2, list(stats.recent))
+    assert restored.mean == pytest.approx(stats.mean)
+    assert restored.variance == pytest.approx(stats.variance)
+    assert restored.hit_rate == pytest.approx(stats.hit_rate)
+    assert dict(restored.top_terms()) == pytest.approx(dict(stats.top_terms()), abs=1e-4)
+
+def test_predict_needs_samples_low_spread_and_repeats():
+    stats = ContextStats()
+    for _ in range(6):
+        stats.update(2, ["Clear skies"])
+    assert stats.predict(min_samples=7, max_std=0.5, min_hit_rate=0.5) is None
+    stats.update(2, ["Clear skies"])
+    assert stats.predict(min_samples=7, max_std=0.5, min_hit_rate=0.5) == 2
+    assert stats.predict(min_samples=7, max_std=0.5, min_hit_rate=0.99) is None
+
+    stats.update(5, ["Clear skies"])
+    assert stats.predict(min_samples=7, max_std=0.5, min_hit_rate=0.5) is None
+
+def test_rebuild_learns_only_confident_model_analyses():
+    analyses = [("weather", 2, ["Clear skies"], "model", True)] * 3 + [
+        ("weather", 5, ["Storm"], source, True) for source in ("stats", "cache", "rules", "default", "monitor", None)
+    ] + [("weather", 5, ["Storm"], "model", False), ("weather", 5, ["Storm"], "model", None)]
+    stats = rebuild_stats(analyses)["weather"]
+    assert (stats.count, stats.mean, stats.variance) == (3, 2, 0)
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {
+        "api_keys": {"openai": "", "news": ""},
+        "city": "Boston",
+        "model": {"enabled": False},
+        "learning": {"predict": True, "min_samples": 3, "max_std": 0.5, "min_hit_rate": 0.5, "revalidate_every": 3}
+    }
+    agent = Agent(config, ContextManager(config))
+    for _ in range(3):
+        agent.record_analysis(ContextType.WEATHER, dict(CLEAR), WEATHER)
+    return agent
+
+def test_predictions_do_not_feed_the_statistics(agent):
+    stats = agent.context_stats["weather"]
+    before = (stats.count, stats.mean, stats.variance, stats.hits, stats.seen)
+    predicted = agent.predicted_analysis(ContextType.WEATHER, WEATHER)
+    assert predicted["source"] == "stats"
+    agent.record_analysis(ContextType.WEATHER, predicted, WEATHER)
+    for source in ("cache", "rules", "default"):
+        agent.record_analysis(ContextType.WEATHER, {"priority": 5, "insights": ["Storm"], "actions": [], "source": source})
+    assert (stats.count, stats.mean, stats.variance, stats.hits, stats.seen) == before
+
+    # Statistics rebuilt from the stored analyses skip them too
+    agent.memory["context_stats"] = {}
+    assert agent._load_stats()["weather"].count == before[0]
+
+def test_model_revalidates_after_repeated_predictions(agent):
+    for _ in range(3):
+        predicted = agent.predicted_analysis(ContextType.WEATHER, WEATHER)
+        assert predicted is not None
+        agent.record_analysis(ContextType.WEATHER, predicted, WEATHER)
+    assert agent.predicted_analysis(ContextType.WEATHER, WEATHER) is None
+
+    # The model's analysis resets the count, so predictions resume
+    agent.record_analysis(ContextType.WEATHER, dict(CLEAR), WEATHER)
+    assert agent.context_stats["weather"].predictions == 0
+    assert agent.predicted_analysis(ContextType.WEATHER, WEATHER) is not None
+
+def test_legacy_and_unconfident_analyses_are_not_learned(agent):
+    stats = agent.context_stats["weather"]
+    before = (stats.count, stats.mean, stats.variance, stats.hits, stats.seen)
+    # A row from an older memory file: the prompt's example answer, without source or confidence
+    legacy = {"priority": 4, "insights": ["High temperature of 28°C with heat advisory in effect"],
+              "actions": ["Stay hydrated and avoid outdoor activities from 12-4 PM"]}
+    unconfident = dict(legacy, source="model", confident=False)
+    for analysis in (legacy, unconfident):
+        agent.record_analysis(ContextType.WEATHER, analysis, WEATHER)
+    assert (stats.count, stats.mean, stats.variance, stats.hits, stats.seen) == before
+    assert "heat" not in dict(stats.top_terms(10))
+
+    agent.memory["context_stats"] = {}
+    rebuilt = agent._load_stats()["weather"]
+    assert (rebuilt.count, rebuilt.mean) == (3, 1)
+
+def test_saved_statistics_from_an_older_version_are_rebuilt(agent):
+    agent.memory["context_stats"] = {"weather": [50, 4.0, 0.0, 0.0, 0.0, {}, [], 0]}
+    stats = agent._load_stats()["weather"]
+    assert (stats.count, stats.mean) == (3, 1)
+
+def test_summary_labels_learned_priority_separately(agent):
+    lines = agent.get_agent_summary().splitlines()
+    assert "- Importance: 1" in lines
+    assert any(line.startswith("  Learned Priority: 1.0 ± 0.0 (n=3, hit rate ") for line in lines)
@@ -0,0 +1,92 @@
+import math
+import os
+import statistics
+import sys
+
+import pytest
+
+# Add the repository root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.decide_priority import percent_change, rule_based_analysis
+from src.market_monitor import MarketMonitor
+
+def make_monitor(tmp_path, **settings) -> MarketMonitor:
+    monitor_settings = {"window": 5, "history_file": str(tmp_path / "market_history.npz")}
+    monitor_settings.update(settings)
+    return MarketMonitor({"market_monitor": monitor_settings})
+
+def feed(monitor: MarketMonitor, *prices: float, symbol: str = "AAPL"):
+    for price in prices:
+        monitor.update({symbol: {"price": price}}, save=False)
+
+def test_dollar_change_is_converted_to_percent():
+    # $6 on a $500 stock is 1.2%, $0.50 on a $5 stock is 10%
+    assert percent_change({"price": 506.0, "change": 6.0}) == pytest.approx(1.2)
+    assert percent_change({"price": 5.5, "change": 0.5}) == pytest.approx(10.0)
+    assert percent_change({"price": 5.5, "change": 0.5, "change_percent": 9.9}) == 9.9
+    assert percent_change({"price": 5.5}) is None
+
+def test_first_fetch_scores_dollar_changes_as_percent(tmp_path):
+    monitor = make_monitor(tmp_path)
+    monitor.update({"BIG": {"price": 506.0, "change": 6.0}}, save=False)
+    assert monitor.get_priority() == 4
+
+    monitor = make_monitor(tmp_path)
+    monitor.update({"SMALL": {"price": 5.5, "change": 0.5}}, save=False)
+    assert monitor.get_priority() == 1
+    assert monitor.get_alerts()[0]["return"] == pytest.approx(10.0)
+
+def test_rolling_store_keeps_the_window_and_gaps(tmp_path):
+    monitor = make_monitor(tmp_path, window=3)
+    feed(monitor, 10.0, 11.0, 12.0, 13.0)
+    monitor.update({"MSFT": {"price": 300.0}}, save=True)
+    assert monitor.symbols == ["AAPL", "MSFT"]
+    aapl, msft = monitor.prices
+    # AAPL was missing from the last fetch, MSFT only appeared in it
+    assert aapl[:2].tolist() == [12.0, 13.0] and math.isnan(aapl[2])
+    assert all(math.isnan(price) for price in msft[:2]) and msft[2] == 300.0
+
+    # A longer window after a restart pads the stored history on the left
+    reloaded = make_monitor(tmp_path, window=4)
+    assert reloaded.symbols == ["AAPL", "MSFT"]
+    assert math.isnan(reloaded.prices[0, 0]) and reloaded.prices[0, 1:3].tolist() == [12.0, 13.0]
+
+def test_z_score_matches_statistics(tmp_path):
+    prices = [100.0, 101.0, 100.0, 101.5, 103.0]
+    monitor = make_monitor(tmp_path)
+    feed(monitor, *prices)
+    returns = [b / a - 1 for a, b in zip(prices, prices[1:])]
+    expected = (returns[-1] - statistics.mean(returns[:-1])) / statistics.stdev(returns[:-1])
+    assert monitor.z_scores()[0] == pytest.approx(expected)
+
+@pytest.mark.parametrize("change_percent,priority", [(5.0, 1), (-5.0, 1), (4.99, 3), (2.5, 3), (1.0, 4)])
+def test_move_threshold_is_inclusive(tmp_path, change_percent, priority):
+    monitor = make_monitor(tmp_path)
+    monitor.update({"AAPL": {"price": 100.0, "change_percent": change_percent}}, save=False)
+    assert monitor.get_priority() == priority
+    assert bool(monitor.get_alerts()) == (priority == 1)
+
+def test_unusual_move_below_threshold_gets_priority_2(tmp_path):
+    monitor = make_monitor(tmp_path, window=8)
+    feed(monitor, 100.0, 100.1, 100.0, 100.1, 100.0, 100.1, 103.0)
+    alerts = monitor.get_alerts()
+    assert monitor.get_priority() == 2
+    assert alerts[0]["symbol"] == "AAPL" and not alerts[0]["threshold_crossed"] and alerts[0]["z_score"] > 2
+
+def test_no_data_is_priority_3(tmp_path):
+    monitor = make_monitor(tmp_path)
+    assert monitor.get_priority() == 3
+    monitor.update({"AAPL": {"price": 100.0}}, save=False)
+    assert monitor.get_priority() == 3
+
+@pytest.mark.parametrize("quote", [
+    {"price": 5.5, "change": 0.5}, {"price": 506.0, "change": 6.0},
+    {"price": 100.0, "change_percent": 5.0}, {"price": 100.0, "change_percent": 4.99}
+])
+def test_rules_agree_with_the_monitor(tmp_path, quote):
+    config = {"market_monitor": {"move_threshold": 5.0, "history_file": str(tmp_path / "market_history.npz")}}
+    monitor = MarketMonitor(config)
+    monitor.update({"AAPL": quote}, save=False)
+    rules = rule_based_analysis("stocks", {"AAPL": quote}, config)
+    assert (rules["priority"] == 1) == (monitor.get_priority() == 1)
@@ -0,0 +1,57 @@
+import json
+import os
+import sys
+
+import pytest
+
+# Add the repository root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.agent import Agent, ResponseParseError
+
+# (context type, response, expected analysis): the distinct answers stored in
+# logs/agent_memory.json, each rendered in the formats seen in the model's output
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "parser_corpus.json")
+with open(CORPUS_FILE, "r", encoding="utf-8") as f:
+    CORPUS = [tuple(entry) for entry in json.load(f)]
+
+@pytest.fixture(scope="module")
+def agent() -> Agent:
+    return Agent({"model": {"enabled": False}})
+
+@pytest.mark.parametrize("context_type,response,expected", CORPUS)
+def test_stored_responses(agent, context_type, response, expected):
+    assert agent._parse_response(response, context_type) == expected
+
+def test_stored_answers_are_flagged_as_copies():
+    # Every stored answer came from parsing the echoed prompt or placeholders, never new text
+    assert len(CORPUS) >= 80
+    assert not any(expected["confident"] for _, _, expected in CORPUS)
+
+def test_original_answer_is_confident(agent):
+    response = "Priority: 1\nInsights:\n- Snow storm warning from noon\nActions:\n- Leave work early"
+    assert agent._parse_response(response, "weather") == {
+        "priority": 1, "insights": ["Snow storm warning from noon"], "actions": ["Leave work early"], "confident": True
+    }
+
+def test_copied_example_is_not_confident(agent):
+    response = "Priority: 4\nInsights:\n- High temperature of 28°C with heat advisory in effect\nActions:\n- Carry water"
+    assert agent._parse_response(response, "weather")["confident"] is False
+
+def test_missing_priority_raises(agent):
+    with pytest.raises(ResponseParseError):
+        agent._parse_response("Insights:\n- Markets are calm\nActions:\n- None", "stocks")
+
+def test_out_of_range_priority_defaults_to_3(agent):
+    analysis = agent._parse_response("Priority: 9\nInsights:\n- Rain later\nActions:\n- Take an umbrella", "weather")
+    assert analysis["priority"] == 3
+    assert analysis["confident"] is False
+
+def test_echoed_priority_label_reads_the_value(agent):
+    # The prompt's "Priority (1-5):" label must not be read as priority 1
+    analysis = agent._parse_response("Priority (1-5): 4\nInsights:\n- a\nActions:\n- b", "weather")
+    assert analysis["priority"] == 4
+
+def test_missing_actions_is_not_confident(agent):
+    analysis = agent._parse_response("Priority: 2\nInsights:\n- Rate cut expected", "news")
+    assert analysis == {"priority": 2, "insights": ["Rate cut expected"], "actions": [], "confident": False}
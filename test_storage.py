@@ -0,0 +1,31 @@
+import os
+import sys
+import threading
+
+# Add the repository root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.context_manager import ContextType
+from src.records import AnalysisRecord
+from src.storage import SQLiteStore
+
+def test_statements_wait_for_a_batched_write(tmp_path):
+    store = SQLiteStore({"storage": {"sqlite_path": str(tmp_path / "store.db")}})
+    store.add_analysis(AnalysisRecord(ContextType.NEWS, 1, 2, ["Story"], [], "hash", "rules"))
+    done = threading.Event()
+
+    def poller():
+        # The command poller's statements, on the same connection
+        store.set_meta("offset", 7)
+        store.get_meta("offset")
+        done.set()
+
+    # A write in progress on another thread holds the lock for its whole transaction
+    with store._lock:
+        thread = threading.Thread(target=poller)
+        thread.start()
+        assert not done.wait(0.3)
+    thread.join(5)
+    assert done.is_set()
+    assert store.get_meta("offset") == 7 and store.count("analyses") == 1
+    store.close()
@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+
+# Add the repository root to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.agent import Agent, ResponseParseError
+from src.context_manager import ContextType
+from src.tracing import configure_tracing, get_tracer
+from src.worker_pool import AnalysisPool
+
+CONFIG = {"workers": {"torch_threads": 1}}
+
+class TracedAgent(Agent):
+    """Records the spans Agent.analyze records, without a model."""
+
+    def _load_model(self):
+        self.tokenizer = None
+        self.model = object()
+
+    def analyze(self, context_type, data):
+        tracer = get_tracer()
+        with tracer.span("tokenize", context=context_type) as span:
+            span["input_tokens"] = 12
+        with tracer.span("generate", context=context_type) as span:
+            if data.get("sleep"):
+                open(data["started"], "w").close()
+                time.sleep(data["sleep"])
+            span["output_tokens"] = 7
+        with tracer.span("parse", context=context_type):
+            if data.get("fail"):
+                raise ResponseParseError("no priority in model output")
+            return dict(self._parse_response("Priority: 2\nInsights:\n- Calm\nActions:\n- None"), source="model")
+
+def test_worker_spans_join_the_parent_trace():
+    tracer = configure_tracing({"tracing": {"enabled": False}})
+    with AnalysisPool(CONFIG, TracedAgent, processes=1) as pool:
+        results = pool.analyze_batch([(ContextType.WEATHER, {}), (ContextType.STOCKS, {"fail": True})])
+    assert results[0]["priority"] == 2 and results[1] is None
+
+    spans = tracer.spans
+    assert [span["name"] for span in spans] == ["model_load", "tokenize", "generate", "parse",
+                                               "tokenize", "generate", "parse"]
+    assert all(span["run_id"] == tracer.run_id and span["pid"] != os.getpid() for span in spans)
+    assert sum(span["attrs"].get("output_tokens", 0) for span in spans) == 14
+    assert [span["status"] for span in spans if span["name"] == "parse"] == ["ok", "error"]
+
+def test_shutdown_without_wait_terminates_busy_workers(tmp_path):
+    started = str(tmp_path / "started")
+    pool = AnalysisPool(CONFIG, TracedAgent, processes=2)
+    future = pool.submit(ContextType.NEWS, {"sleep": 60, "started": started})
+    deadline = time.time() + 30
+    while not os.path.exists(started) and time.time() < deadline:
+        time.sleep(0.05)
+    assert os.path.exists(started)
+
+    processes = list(pool.executor._processes.values())
+    start = time.perf_counter()
+    pool.shutdown(wait=False)
+    for process in processes:
+        process.join(5)
+    assert not any(process.is_alive() for process in processes)
+    assert future.exception(timeout=5) is not None
+    assert time.perf_counter() - start < 10